@@ -1,28 +1,68 @@
 # scripts/crawl.py
-import os, sys, json, traceback, argparse, hashlib, time
+import os, sys, json, traceback, argparse, hashlib, time, asyncio
 from typing import List, Dict, Set
 
 # Make src importable
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Providers
-from src.ingest.greenhouse import crawl_greenhouse
-from src.ingest.lever import crawl_lever
-from src.ingest.linkedin import crawl_linkedin
-from src.ingest.indeed import crawl_indeed
+# Providers (async variants; all boards share one event loop + pooled session)
+from src.ingest.greenhouse import acrawl_greenhouse
+from src.ingest.lever import acrawl_lever
+from src.ingest.linkedin import acrawl_linkedin
+from src.ingest.indeed import acrawl_indeed
+from src.ingest.utils import async_session
+from src.ingest.httpcache import http_cache
+from src.core.index import JobIndex, db_watermark
+from src.core.store import JobStore, job_store
+from src.core.schema import Job
+from src.core.postgrest import client
 
 # Scoring/token helpers (for profile-driven filters)
-from src.core.scoring import tokens_from_terms, tokenize
+from src.core.scoring import CompiledProfile, compile_profile, tokenize, any_substring_re, token_cache_stats
 
-import requests
 from datetime import datetime, timezone
 
 ROOT = os.path.dirname(__file__)
 DATA_DIR = os.path.join(ROOT, '..', 'data')
-OUT_JSONL = os.path.join(DATA_DIR, 'jobs.jsonl')
-
-SUPABASE_URL = os.environ["SUPABASE_URL"].rstrip("/")
-SRK = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+CHECKPOINT_PATH = os.getenv("CRAWL_CHECKPOINT") or os.path.join(DATA_DIR, 'crawl_checkpoint.json')
+
+# skip(url) -> True means "already stored and open": providers with a per-job
+# detail fetch may leave those pages alone (incremental mode).
+CRAWLERS = {
+    'greenhouse': lambda slug, profile, skip: acrawl_greenhouse(slug, skip_detail=skip),
+    'lever':      lambda slug, profile, skip: acrawl_lever(slug),
+    'linkedin':   lambda slug, profile, skip: acrawl_linkedin(profile),   # slug ignored; we build from profile
+    'indeed':     lambda slug, profile, skip: acrawl_indeed(profile),     # slug ignored; we build from profile
+}
+
+# Scheduler: global cap on boards in flight + per-source caps
+# (CRAWL_SOURCE_CAPS="linkedin=1,indeed=1,greenhouse=8,lever=8"; unlisted sources get 4).
+CRAWL_CONCURRENCY = max(1, int(os.getenv("CRAWL_CONCURRENCY", "8")))
+DEFAULT_SOURCE_CAPS = {'linkedin': 1, 'indeed': 1, 'greenhouse': 8, 'lever': 8}
+
+def _source_caps() -> Dict[str, int]:
+    caps = dict(DEFAULT_SOURCE_CAPS)
+    for part in (os.getenv("CRAWL_SOURCE_CAPS") or "").split(","):
+        name, _, n = part.partition("=")
+        if name.strip() and n.strip().isdigit():
+            caps[name.strip().lower()] = max(1, int(n))
+    return caps
+
+# Pipeline: crawl -> filter/dedup -> persist, joined by bounded queues so at most
+# CRAWL_QUEUE_SIZE crawled boards and PERSIST_QUEUE_SIZE batches wait in memory.
+CRAWL_QUEUE_SIZE = max(1, int(os.getenv("CRAWL_QUEUE_SIZE", "4")))
+PERSIST_QUEUE_SIZE = max(1, int(os.getenv("PERSIST_QUEUE_SIZE", "4")))
+PERSIST_BATCH = max(1, int(os.getenv("PERSIST_BATCH", "200")))
+
+# Sources whose crawl returns the whole board, so a missing posting really closed.
+# Search-driven sources (LinkedIn/Indeed) only show a window of results.
+FULL_LISTING_SOURCES = {'greenhouse', 'lever'}
+
+# Board statuses are buffered and written to public.boards every
+# BOARD_STATUS_FLUSH_S seconds and when the run ends, as a few PATCHes keyed on
+# source/slug exactly as _get_boards returned them (update-only: a status never
+# creates a board). last_crawled_at is stamped when the statuses are written.
+BOARD_STATUS_FLUSH_S = max(0.0, float(os.getenv("BOARD_STATUS_FLUSH_S", "30")))
 
 def _sha1(s: str) -> str:
     import hashlib
@@ -31,124 +71,397 @@ def _sha1(s: str) -> str:
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
-def _dedup_on_url(items: List[Dict]) -> List[Dict]:
-    seen = set(); out = []
-    for j in items:
-        u = (j.get('url') or '').strip().lower()
-        if not u or u in seen: continue
-        seen.add(u); out.append(j)
-    return out
+def _content_hash(j: Job | Dict) -> str:
+    """Hash of the fields we store; a changed posting gets a new hash."""
+    blob = json.dumps([j.get(k) or "" for k in ("title", "company", "location", "description", "posted_at")])
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+# ---------- Checkpoints (resumable runs) ----------
+def _run_window() -> str:
+    """Identifies 'this run': CRAWL_RUN_ID, the GitHub run id (stable across re-runs), or the UTC date."""
+    return os.getenv("CRAWL_RUN_ID") or os.getenv("GITHUB_RUN_ID") or datetime.now(timezone.utc).date().isoformat()
+
+def _load_checkpoint(user_id: str, window: str, resume: bool) -> Dict:
+    """Checkpoint for (user, window); a fresh one unless resuming a matching run."""
+    fresh = {"user_id": user_id, "window": window, "started_at": _now_iso(), "boards": {}}
+    if not resume:
+        return fresh
+    try:
+        with open(CHECKPOINT_PATH) as f:
+            cp = json.load(f)
+    except Exception:
+        return fresh
+    if cp.get("user_id") != user_id or cp.get("window") != window or not isinstance(cp.get("boards"), dict):
+        return fresh
+    return cp
+
+def _save_checkpoint(cp: Dict):
+    tmp = CHECKPOINT_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(cp, f, indent=2)
+    os.replace(tmp, CHECKPOINT_PATH)
 
 def _get_profile(user_id: str) -> dict:
-    url = f"{SUPABASE_URL}/rest/v1/profiles?id=eq.{user_id}&select=*"
-    r = requests.get(url, headers={"apikey": SRK, "Authorization": f"Bearer {SRK}"}, timeout=30)
-    r.raise_for_status()
-    arr = r.json()
-    return (arr[0] if arr else {}) or {}
+    return client().get_one(f"profiles?id=eq.{user_id}&select=*")
 
 def _get_boards() -> List[Dict]:
     # include enabled boards with source+slug, leave room for future registries
-    url = f"{SUPABASE_URL}/rest/v1/boards?enabled=eq.true&select=source,slug"
-    r = requests.get(url, headers={"apikey": SRK, "Authorization": f"Bearer {SRK}"}, timeout=30)
-    r.raise_for_status()
-    return r.json() or []
+    return client().get("boards?enabled=eq.true&select=source,slug")
+
+def _get_known_jobs(user_id: str) -> Dict[str, Dict]:
+    """
+    url_hash -> {content_hash, source, source_slug, closed_at} for the user's stored jobs.
+    Incremental mode needs public.jobs to carry content_hash (text) and closed_at (timestamptz).
+    """
+    known: Dict[str, Dict] = {}
+    PAGE = 1000
+    offset = 0
+    while True:
+        rows = client().get(f"jobs?user_id=eq.{user_id}"
+                            f"&select=url_hash,content_hash,source,source_slug,closed_at"
+                            f"&order=url_hash.asc&limit={PAGE}&offset={offset}", timeout=60)
+        for row in rows:
+            known[row["url_hash"]] = row
+        if len(rows) < PAGE:
+            return known
+        offset += PAGE
+
+def _close_jobs(user_id: str, url_hashes: List[str]):
+    """Stamp closed_at on postings that vanished from their board."""
+    payload = {"closed_at": _now_iso()}
+    CHUNK = 100  # keep the in.(...) filter well under URL length limits
+    for i in range(0, len(url_hashes), CHUNK):
+        chunk = ",".join(url_hashes[i:i+CHUNK])
+        client().patch(f"jobs?user_id=eq.{user_id}&url_hash=in.({chunk})", payload)
+
+def _is_open(known: Dict[str, Dict], url: str) -> bool:
+    row = known.get(_sha1(url))
+    return row is not None and not row.get("closed_at")
+
+def _needs_upsert(known: Dict[str, Dict], j: Job) -> bool:
+    row = known.get(_sha1(j.get("url", "")))
+    return row is None or bool(row.get("closed_at")) or row.get("content_hash") != _content_hash(j)
+
+def _vanished(known: Dict[str, Dict], src: str, slug: str, found: Set[str]) -> List[str]:
+    """Open stored jobs from this board that the latest crawl no longer lists."""
+    return [h for h, row in known.items()
+            if row.get("source") == src and (row.get("source_slug") or "").lower() == slug
+            and not row.get("closed_at") and h not in found]
+
+_board_status = None            # PatchBuffer, created on first use
+_board_status_flushed = time.monotonic()
 
 def _update_board_status(source: str, slug: str, status: str, error: str | None = None):
-    url = f"{SUPABASE_URL}/rest/v1/boards?source=eq.{source}&slug=eq.{slug}"
-    payload = {"status": status, "error": error or None, "last_crawled_at": _now_iso()}
-    requests.patch(
-        url,
-        headers={
-            "apikey": SRK, "Authorization": f"Bearer {SRK}",
-            "Content-Type": "application/json", "Prefer": "return=minimal"
-        },
-        data=json.dumps(payload),
-        timeout=20,
-    )
+    """
+    Buffer the status of the boards row keyed (source, slug) as stored, not
+    normalized (a later write for the same row replaces it); flush if one is due.
+    """
+    global _board_status
+    if _board_status is None:
+        _board_status = client().buffer("boards", "source,slug")
+    _board_status.put((source, slug), {"status": status, "error": error or None})
+    if time.monotonic() - _board_status_flushed >= BOARD_STATUS_FLUSH_S:
+        _flush_board_status()
+
+def _flush_board_status():
+    """PATCH every buffered status; on failure the unsent ones stay buffered for the next flush."""
+    global _board_status_flushed
+    _board_status_flushed = time.monotonic()
+    if not _board_status:
+        return
+    try:
+        n = _board_status.flush({"last_crawled_at": _now_iso()})
+        print(f"  board status: {n} boards updated")
+    except Exception as e:
+        print(f"  !! Board status update failed ({len(_board_status)} boards pending): {e}")
 
 # ---------- Profile-driven filtering ----------
-def _build_filters(profile: dict):
+def _build_filters(cp: CompiledProfile):
     """
     inc/exc: use skills + titles inclusions, with a strict TITLE gate so we can
     safely crawl general-purpose job boards (LinkedIn/Indeed) without relying on
-    hand-curated exclusion lists.
+    hand-curated exclusion lists. Token sets come precompiled on the profile
+    (gate_titles already carries the editor/editorial synonyms).
     """
-    title_tokens = tokens_from_terms(profile.get('target_titles'))
-
-    # lightweight synonyms to not miss obvious variants
-    if "editor" in title_tokens:    title_tokens.add("editorial")
-    if "editorial" in title_tokens: title_tokens.add("editor")
-    if "writer" in title_tokens:    title_tokens.add("writer")
-
-    skill_tokens = tokens_from_terms(profile.get('skills'))
-    inc = title_tokens | skill_tokens
-
     # sensible default exclusions (still helpful)
-    exc = {"senior","staff","principal","lead","manager","director"}
+    exc = frozenset({"senior","staff","principal","lead","manager","director"})
 
-    return title_tokens, inc, exc
+    return cp.gate_titles, cp.include, exc
 
-def _keep_factory(title_tokens: Set[str], inc: Set[str], exc: Set[str]):
+def _keep_factory(cp: CompiledProfile, exc: Set[str]):
     """
     Keep a job if:
       (1) Title contains ANY target-title token (strict gate),
       (2) title+desc contains ANY include token,
       (3) and NONE of the exclude tokens.
+    Substring checks run as one precompiled alternation each.
     """
-    def _keep(j: Dict) -> bool:
-        title = str(j.get('title') or '').lower()
-        desc  = str(j.get('description') or '').lower()
-        blob  = f"{title} {desc}"
+    title_tokens = cp.gate_titles
+    inc_re = cp.include_re
+    exc_re = any_substring_re(exc)
 
+    def _keep(j: Job) -> bool:
+        title = str(j.get('title') or '').lower()
         if title_tokens and not (title_tokens & tokenize(title)):
             return False
-        if inc and not any(k in blob for k in inc):
+
+        # description read only past the title gate (providers may build it lazily)
+        desc  = str(j.get('description') or '').lower()
+        blob  = f"{title} {desc}"
+        if inc_re and not inc_re.search(blob):
             return False
-        if exc and any(k in blob for k in exc):
+        if exc_re and exc_re.search(blob):
             return False
         return True
     return _keep
 
-def _upsert_jobs(user_id: str, jobs: List[Dict]):
+def _job_row(user_id: str, j: Job | Dict) -> Dict:
+    """A crawled job shaped as a public.jobs row (the serialization boundary for Job)."""
+    return {
+        "user_id": user_id,
+        "source": j.get("source",""),
+        "source_slug": j.get("company") if j.get("source") in ("greenhouse","lever") else (j.get("source_slug") or None),
+        "url": j.get("url",""),
+        "url_hash": _sha1(j.get("url","")),
+        "title": j.get("title",""),
+        "company": j.get("company"),
+        "location": j.get("location"),
+        "description": j.get("description"),
+        "posted_at": j.get("posted_at"),
+        "meta": j.get("extras") or {},
+    }
+
+def _upsert_jobs(user_id: str, jobs: List[Job], incremental: bool = False):
     """
     Bulk upsert into public.jobs with on_conflict(user_id,url_hash).
+    Incremental runs also write content_hash and reopen (closed_at=null) the row.
     """
     if not jobs:
         return
     # shape rows
     rows = []
     for j in jobs:
-        rows.append({
-            "user_id": user_id,
-            "source": j.get("source",""),
-            "source_slug": j.get("company") if j.get("source") in ("greenhouse","lever") else (j.get("source_slug") or None),
-            "url": j.get("url",""),
-            "url_hash": _sha1(j.get("url","")),
-            "title": j.get("title",""),
-            "company": j.get("company"),
-            "location": j.get("location"),
-            "description": j.get("description"),
-            "posted_at": j.get("posted_at"),
-            "meta": j.get("extras") or {},
-        })
-    # chunk to keep payload reasonable
-    url = f"{SUPABASE_URL}/rest/v1/jobs?on_conflict=user_id,url_hash"
-    headers = {
-        "apikey": SRK, "Authorization": f"Bearer {SRK}",
-        "Content-Type": "application/json", "Prefer": "resolution=merge-duplicates"
-    }
-    CHUNK = 500
-    for i in range(0, len(rows), CHUNK):
-        chunk = rows[i:i+CHUNK]
-        r = requests.post(url, headers=headers, data=json.dumps(chunk), timeout=60)
-        r.raise_for_status()
+        row = _job_row(user_id, j)
+        if incremental:
+            row["content_hash"] = _content_hash(j)
+            row["closed_at"] = None
+        rows.append(row)
+    # gzip'd, byte-sized chunks with retries (see src/core/bulkwrite.py)
+    for st in client().upsert("jobs", rows, on_conflict="user_id,url_hash"):
+        print(f"    upsert chunk: {st.rows} rows {st.raw_bytes / 1024:.0f}->{st.sent_bytes / 1024:.0f} KiB "
+              f"in {st.seconds:.2f}s" + (f" ({st.attempts} attempts)" if st.attempts > 1 else ""))
+
+async def _crawl_board(src: str, slug: str, profile: dict, skip, global_sem, source_sem, out: asyncio.Queue):
+    """
+    Crawl stage: run one board's crawler under the global + per-source caps and hand
+    (src, slug, jobs, error, seconds) to the filter stage. The put happens while the
+    global slot is still held, so a full queue stops new boards from starting.
+    """
+    async with global_sem:
+        async with source_sem:
+            print(f'-- Crawling {src}:{slug} --')
+            t0 = time.monotonic()
+            try:
+                jobs, err = await CRAWLERS[src](slug, profile, skip), None
+            except Exception as e:
+                jobs, err = [], e
+            secs = time.monotonic() - t0
+        await out.put((src, slug, jobs, err, secs))
 
-def main(user_id: str):
+def _filter_board(keep, jobs: List[Job], seen: Set[str]) -> List[Job]:
+    """keep() + run-wide URL dedup (seen holds url hashes already kept this run)."""
+    kept = []
+    for j in jobs:
+        if j.get('detail_skipped') or not keep(j):
+            continue
+        h = _sha1(j.get('url', ''))
+        if not (j.get('url') or '').strip() or h in seen:
+            continue
+        seen.add(h)
+        kept.append(j)
+    return kept
+
+async def _filter_stage(keep, known: Dict[str, Dict] | None, crawled: asyncio.Queue, persist: asyncio.Queue):
+    """Filter stage: crawled boards -> ('batch', ...) items then one ('board', ...) marker per board."""
+    seen: Set[str] = set()
+    while (item := await crawled.get()) is not None:
+        src, slug, jobs, err, secs = item
+        if err is not None:
+            print(f'  !! Failed {src}:{slug} after {secs:.1f}s: {err.__class__.__name__}: {err}')
+            traceback.print_exception(err, limit=1)
+            await persist.put(('board', src, slug, ([], 0), f"crawl: {err.__class__.__name__}: {err}"))
+            continue
+
+        kept = await asyncio.to_thread(_filter_board, keep, jobs, seen)
+        print(f'  {src}:{slug} crawled in {secs:.1f}s found={len(jobs)} kept={len(kept)}')
+
+        closed = []
+        if known is not None and jobs and src in FULL_LISTING_SOURCES:
+            closed = _vanished(known, src, slug, {_sha1(j.get('url','')) for j in jobs})
+        found = len(jobs)
+        del jobs
+
+        for k in range(0, len(kept), PERSIST_BATCH):
+            await persist.put(('batch', src, slug, kept[k:k+PERSIST_BATCH], None))
+        await persist.put(('board', src, slug, (closed, found), None))
+    await persist.put(None)
+
+def _persist_batch(user_id: str, known: Dict[str, Dict] | None, jobs: List[Job]) -> int:
+    changed = jobs if known is None else [j for j in jobs if _needs_upsert(known, j)]
+    _upsert_jobs(user_id, changed, incremental=known is not None)
+    return len(changed)
+
+def _store_batch(store: JobStore, user_id: str, jobs: List[Job]):
+    """Mirror a persisted batch into the local store (every kept job, open, with its content_hash)."""
+    store.upsert_jobs(user_id, [dict(_job_row(user_id, j), content_hash=_content_hash(j)) for j in jobs])
+
+def _finish_board(user_id: str, closed: List[str], error: str | None, rows: List[tuple]):
+    """Close vanished postings, then record the status on the board's rows (raw (source, slug) keys)."""
+    if error is None and closed:
+        try:
+            _close_jobs(user_id, closed)
+        except Exception as e:
+            error = f"persist: {e}"
+    for source, slug in rows:
+        _update_board_status(source, slug, "error" if error else "ok", error)
+    return error
+
+async def _persist_stage(user_id: str, known: Dict[str, Dict] | None, persist: asyncio.Queue,
+                         store: JobStore | None = None, checkpoint: Dict | None = None, index: JobIndex | None = None,
+                         board_rows: Dict[tuple, List[tuple]] | None = None):
+    """
+    Persist stage: upsert each batch to the DB and, once that succeeds, to the
+    local job store as it arrives (a crash loses at most the batch in flight);
+    on a board's marker, close vanished postings, write its status and
+    checkpoint it. A batch the DB refused is neither stored nor counted as
+    kept, and its error becomes the board's status.
+    Stored jobs are added to `index` and closed ones dropped from it.
+    `board_rows` maps each normalized board to the raw boards-row keys its
+    status is written to. Returns (kept, failures).
+    """
+    kept_total = failures = 0
+    errors: Dict[tuple, str] = {}      # board -> first persist error
+    changed: Dict[tuple, int] = {}
+    kept_by_board: Dict[tuple, int] = {}
+    while (item := await persist.get()) is not None:
+        kind, src, slug, payload, error = item
+        board = (src, slug)
+        if kind == 'batch':
+            try:
+                n = await asyncio.to_thread(_persist_batch, user_id, known, payload)
+            except Exception as e:
+                errors.setdefault(board, f"persist: {e}")
+                print(f'  !! Persist failed for {src}:{slug} ({len(payload)} jobs): {e}')
+                continue
+            changed[board] = changed.get(board, 0) + n
+            if index is not None:
+                for j in payload:
+                    index.add(_sha1(j.get('url', '')), j.get('title') or '', j.get('posted_at'))
+            if store is not None:
+                try:
+                    await asyncio.to_thread(_store_batch, store, user_id, payload)
+                except Exception as e:
+                    print(f'  !! Local store write failed for {src}:{slug}: {e}')
+            kept_total += len(payload)
+            kept_by_board[board] = kept_by_board.get(board, 0) + len(payload)
+            continue
+
+        # board finished: every batch for it has been handled above
+        closed, found = payload
+        error = error or errors.pop(board, None)
+        rows = (board_rows or {}).get(board) or [board]
+        error = await asyncio.to_thread(_finish_board, user_id, closed, error, rows)
+        if closed and not error:
+            if index is not None:
+                for h in closed:
+                    index.remove(h)
+            if store is not None:
+                try:
+                    await asyncio.to_thread(store.close_jobs, user_id, closed)
+                except Exception as e:
+                    print(f'  !! Local store close failed for {src}:{slug}: {e}')
+        if error:
+            failures += 1
+        elif known is not None:
+            print(f'  {src}:{slug} incremental: changed={changed.get(board, 0)} closed={len(closed)}')
+        # a board is the smallest unit of work: no mid-board cursor is kept,
+        # so an 'error' board is recrawled whole on --resume
+        if checkpoint is not None:
+            checkpoint["boards"][f"{src}:{slug}"] = {
+                "status": "error" if error else "ok",
+                "error": error,
+                "found": found,
+                "kept": kept_by_board.get(board, 0),
+                "changed": changed.get(board, 0),
+                "closed": len(closed),
+                "finished_at": _now_iso(),
+            }
+            await asyncio.to_thread(_save_checkpoint, checkpoint)
+        changed.pop(board, None)
+        kept_by_board.pop(board, None)
+    return kept_total, failures
+
+async def _crawl_boards(user_id: str, profile: dict, keep, boards: List[Dict], known: Dict[str, Dict] | None = None,
+                        store: JobStore | None = None, checkpoint: Dict | None = None, index: JobIndex | None = None):
+    """
+    Crawl boards concurrently (CRAWL_CONCURRENCY overall, per-source caps from
+    _source_caps) and stream them through filter and persist stages; returns
+    (kept job count, failure count).
+    With `known` (incremental mode) only new/changed jobs are upserted and
+    postings gone from full-listing boards are closed.
+    Boards already 'ok' in `checkpoint` are skipped; finished boards are added to it.
+    """
+    done = {k for k, v in ((checkpoint or {}).get("boards") or {}).items() if v.get("status") == "ok"}
+    skip = (lambda url: _is_open(known, url)) if known is not None else None
+
+    caps = _source_caps()
+    global_sem = asyncio.Semaphore(CRAWL_CONCURRENCY)
+    source_sems: Dict[str, asyncio.Semaphore] = {}
+    crawled: asyncio.Queue = asyncio.Queue(maxsize=CRAWL_QUEUE_SIZE)
+    persist: asyncio.Queue = asyncio.Queue(maxsize=PERSIST_QUEUE_SIZE)
+
+    # crawlers take normalized names; statuses go back to the rows as stored
+    # (rows differing only in case/whitespace are crawled once and all updated)
+    board_rows: Dict[tuple, List[tuple]] = {}
+    for b in boards:
+        src = (b.get('source') or '').strip().lower()
+        slug = (b.get('slug') or '').strip().lower()
+        if src and slug:
+            board_rows.setdefault((src, slug), []).append((b.get('source'), b.get('slug')))
+
+    async with async_session():
+        tasks = []
+        for (src, slug), rows in board_rows.items():
+            if f"{src}:{slug}" in done:
+                print(f'-- Skipping {src}:{slug} (done earlier in this run window) --')
+                continue
+            if src not in CRAWLERS:
+                print(f'  !! Unknown source {src} (skipping)')
+                for row in rows:
+                    await asyncio.to_thread(_update_board_status, *row, "skipped", f"unknown source {src}")
+                continue
+            if src not in source_sems:
+                source_sems[src] = asyncio.Semaphore(caps.get(src, 4))
+            tasks.append(_crawl_board(src, slug, profile, skip, global_sem, source_sems[src], crawled))
+
+        async def crawl_all():
+            await asyncio.gather(*tasks)
+            await crawled.put(None)
+
+        _, _, (kept, failures) = await asyncio.gather(
+            crawl_all(),
+            _filter_stage(keep, known, crawled, persist),
+            _persist_stage(user_id, known, persist, store, checkpoint, index, board_rows),
+        )
+    return kept, failures
+
+def main(user_id: str, incremental: bool = False, resume: bool = False):
     os.makedirs(DATA_DIR, exist_ok=True)
 
     profile = _get_profile(user_id)
-    title_tokens, inc, exc = _build_filters(profile)
-    keep = _keep_factory(title_tokens, inc, exc)
+    cp = compile_profile(profile)
+    title_tokens, inc, exc = _build_filters(cp)
+    keep = _keep_factory(cp, exc)
 
     print("Title gate tokens:", sorted(list(title_tokens)))
     print("Include tokens (sample 30):", sorted(list(inc))[:30], "…")
@@ -158,57 +471,57 @@ def main(user_id: str):
     if not boards:
         print("No boards in Supabase table 'boards'."); return
 
-    all_jobs: List[Dict] = []
-    failures = 0
-    for b in boards:
-        src = (b.get('source') or '').strip().lower()
-        slug = (b.get('slug') or '').strip().lower()
-        if not src or not slug: continue
-
-        print(f'-- Crawling {src}:{slug} --')
+    known = None
+    if incremental:
+        known = _get_known_jobs(user_id)
+        print(f"Incremental mode: {len(known)} stored jobs")
+
+    checkpoint = _load_checkpoint(user_id, _run_window(), resume)
+    if checkpoint["boards"]:
+        print(f"Resuming run {checkpoint['window']}: {len(checkpoint['boards'])} boards already checkpointed")
+
+    # rank's candidate index; a stale one (crash, jobs written elsewhere) is rebuilt by rank.
+    # One verified against the DB before this run stays verified after it: it
+    # tracks every write the run makes, so the new watermark is carried forward.
+    index = JobIndex.load(user_id)
+    verified = index.synced is not None and index.synced == db_watermark(user_id)
+
+    # local job store (data/jobs.sqlite3) for offline rank runs and draft_email, fed by the persist stage
+    store = job_store()
+    try:
+        kept, failures = asyncio.run(_crawl_boards(user_id, profile, keep, boards, known,
+                                                   store=store, checkpoint=checkpoint, index=index))
+    finally:
+        # statuses first: a failed index write must not leave them unflushed
+        _flush_board_status()
+        mark = db_watermark(user_id) if verified else None
+        index.synced = mark if mark and mark[0] == len(index) else None
         try:
-            if src == 'greenhouse':
-                jobs = crawl_greenhouse(slug)
-            elif src == 'lever':
-                jobs = crawl_lever(slug)
-            elif src == 'linkedin':
-                jobs = crawl_linkedin(profile)   # slug ignored; we build from profile
-            elif src == 'indeed':
-                jobs = crawl_indeed(profile)     # slug ignored; we build from profile
-            else:
-                print(f'  !! Unknown source {src} (skipping)'); 
-                _update_board_status(src, slug, "skipped", f"unknown source {src}")
-                continue
-
-            kept = [j for j in jobs if keep(j)]
-            kept = _dedup_on_url(kept)
-            print(f'  found={len(jobs)} kept={len(kept)}')
+            index.save()
+        except OSError as e:
+            print(f"!! Could not save the job index ({e}); rank will rebuild it")
 
-            # persist
-            try:
-                _upsert_jobs(user_id, kept)
-                _update_board_status(src, slug, "ok", None)
-            except Exception as e:
-                failures += 1
-                _update_board_status(src, slug, "error", f"persist: {e}")
-                print(f'  !! Persist failed for {src}:{slug}: {e}')
+    print(f"Crawled {kept} jobs across {len(boards)} boards (failures: {failures})"
+          + (f" -> {store.path} ({store.count(user_id)} open)" if store else ""))
 
-            all_jobs.extend(kept)
-        except Exception as e:
-            failures += 1
-            _update_board_status(src, slug, "error", f"crawl: {e.__class__.__name__}: {e}")
-            print(f'  !! Failed {src}:{slug}: {e.__class__.__name__}: {e}')
-            traceback.print_exc(limit=1)
+    cache = http_cache()
+    if cache:
+        st = cache.stats()
+        evicted = cache.evict()
+        print(f"HTTP cache: hits={st['hits']} misses={st['misses']} "
+              f"saved={st['bytes_saved'] / 1024:.1f} KiB evicted={evicted}")
 
-    # keep legacy artifact for downstream ranker and dev visibility
-    with open(OUT_JSONL, 'w') as f:
-        for j in all_jobs:
-            f.write(json.dumps(j) + '\n')
+    print(f"Job upserts: {client().writer('jobs', 'user_id,url_hash').summary()}")
 
-    print(f"Crawled {len(all_jobs)} jobs across {len(boards)} boards (failures: {failures}) -> {OUT_JSONL}")
+    ts = token_cache_stats()
+    print(f"Token cache: hits={ts['hits']} misses={ts['misses']} size={ts['size']} vocab={ts['vocab']}")
 
 if __name__ == '__main__':
     ap = argparse.ArgumentParser()
     ap.add_argument('--user', required=True)
+    ap.add_argument('--incremental', action='store_true',
+                    help='fetch/upsert only new or changed jobs and close vanished ones')
+    ap.add_argument('--resume', action='store_true',
+                    help='skip boards already checkpointed ok in this run window (CRAWL_RUN_ID / GITHUB_RUN_ID / UTC date)')
     args = ap.parse_args()
-    main(args.user)
+    main(args.user, incremental=args.incremental, resume=args.resume)
@@ -43,7 +43,10 @@ from src.tailor.resume import (
 # vocab augmentation (existing)
 from src.skills.taxonomy import augment_allowed_vocab
 
-import requests
+# local job store (full descriptions; scores.json rows are compact)
+from src.core.store import job_store, store_path, url_hash
+from src.core.postgrest import client
+
 from bs4 import BeautifulSoup
 
 
@@ -78,17 +81,10 @@ def jd_sha(s: str) -> str:
 
 
 # ------------------ Supabase profile ------------------
-SUPABASE_URL = os.environ.get("SUPABASE_URL","").rstrip("/")
-SRK = os.environ.get("SUPABASE_SERVICE_ROLE_KEY","")
-
 def load_profile_for_user(user_id: str) -> dict:
-    if not (SUPABASE_URL and SRK and user_id):
+    if not (client().configured and user_id):
         return {}
-    url = f"{SUPABASE_URL}/rest/v1/profiles?id=eq.{user_id}&select=*"
-    r = requests.get(url, headers={"apikey": SRK, "Authorization": f"Bearer {SRK}"}, timeout=30)
-    r.raise_for_status()
-    arr = r.json()
-    return (arr[0] if arr else {}) or {}
+    return client().get_one(f"profiles?id=eq.{user_id}&select=*")
 
 
 # ------------------ allowed vocab ------------------
@@ -174,8 +170,48 @@ def best_url(job: dict) -> str:
     return job.get("url") or job.get("link") or job.get("jd_url") or ""
 
 
-def best_desc(job: dict) -> str:
+def job_key(job: dict) -> str:
+    url = best_url(job)
+    return job.get("url_hash") or (url_hash(url) if url else "")
+
+
+def load_descs(jobs: List[dict], user_id: str) -> Dict[str, str]:
+    """Descriptions crawl stored in public.jobs for these postings, by url_hash (one request)."""
+    keys = sorted({k for k in map(job_key, jobs) if k})
+    if not (keys and client().configured):
+        return {}
+    try:
+        rows = client().get(f"jobs?user_id=eq.{user_id}&url_hash=in.({','.join(keys)})"
+                            f"&select=url_hash,description")
+    except Exception as e:
+        print(f"Could not load stored descriptions: {e}")
+        return {}
+    return {r["url_hash"]: (r.get("description") or "").strip() for r in rows if r.get("url_hash")}
+
+
+def stored_desc(job: dict, descs: Dict[str, str]) -> str:
+    """The description crawl stored for this posting: public.jobs first, else a local job store if one exists."""
+    key = job_key(job)
+    if not key:
+        return ""
+    if descs.get(key):
+        return descs[key]
+    store = job_store() if os.path.exists(store_path()) else None
+    if store is None:
+        return ""
+    try:
+        row = store.find(key)
+    except Exception:
+        return ""
+    return ((row or {}).get("description") or "").strip()
+
+
+def best_desc(job: dict, descs: Dict[str, str]) -> str:
     desc = (job.get("description") or "").strip()
+    if len(desc) < 800:
+        stored = stored_desc(job, descs)
+        if len(stored) > len(desc):
+            desc = stored
     if len(desc) >= 800:
         return desc
     live = fetch_jd_plaintext(best_url(job)) if best_url(job) else ""
@@ -238,6 +274,7 @@ def main(top: int, user: Optional[str]):
         if key in seen: continue
         seen.add(key); deduped.append(j)
     jobs = deduped[: max(1, min(20, int(top or 5)))]
+    descs = load_descs(jobs, user)
 
     # dirs
     os.makedirs(OUTBOX_MD, exist_ok=True)
@@ -293,7 +330,7 @@ def main(top: int, user: Optional[str]):
         slug = f"{safe_company}_{safe_title}"[:150] or safe_slug(url) or "job"
 
         # ----- JD text -----
-        jd_text = best_desc(j)
+        jd_text = best_desc(j, descs)
         tmp_job = dict(j); tmp_job["description"] = jd_text
         jd_kws = extract_jd_terms(tmp_job, allowed, cap=24)
 
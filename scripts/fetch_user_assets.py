@@ -1,19 +1,19 @@
 # scripts/fetch_user_assets.py
-import os, requests, argparse, hashlib
+import os, sys, argparse, hashlib
 
-SUPABASE_URL = os.environ["SUPABASE_URL"].rstrip("/")
-SRK = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.core.postgrest import client
+
+if not client().configured:
+  raise SystemExit("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required")
 
 def query(q):
-  r = requests.get(q, headers={"apikey": SRK, "Authorization": f"Bearer {SRK}"}, timeout=30)
-  r.raise_for_status(); return r.json()
+  return client().get(q)
 
 def download(bucket, path, out_path):
-  url = f"{SUPABASE_URL}/storage/v1/object/{bucket}/{path}"
-  r = requests.get(url, headers={"Authorization": f"Bearer {SRK}"}, timeout=60)
-  r.raise_for_status()
+  content = client().download(bucket, path)
   os.makedirs(os.path.dirname(out_path), exist_ok=True)
-  with open(out_path, "wb") as f: f.write(r.content)
+  with open(out_path, "wb") as f: f.write(content)
 
 def sha1(path):
   h = hashlib.sha1()
@@ -23,7 +23,7 @@ def sha1(path):
   return h.hexdigest()
 
 def main(user_id):
-  rows = query(f"{SUPABASE_URL}/rest/v1/resumes?user_id=eq.{user_id}&select=bucket,path,created_at&order=created_at.desc&limit=1")
+  rows = query(f"resumes?user_id=eq.{user_id}&select=bucket,path,created_at&order=created_at.desc&limit=1")
   if not rows:
     print("No resume for user", user_id); return
   row = rows[0]
@@ -14,12 +14,13 @@ If you don't want to hit Supabase for profile:
   python scripts/linkedin_optimize.py --pdf linkedin.pdf --profile path/to/profile.json
 """
 
-import os, sys, re, json, argparse, requests
+import os, sys, re, json, argparse
 from datetime import datetime
 from typing import Dict, List, Tuple
 
 # repo-relative imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.core.postgrest import client
 try:
     from src.core.scoring import tokenize as py_tokenize, tokens_from_terms as py_tokens_from_terms
 except Exception:
@@ -51,9 +52,6 @@ try:
 except Exception as e:
     raise SystemExit("Install pdfminer.six: pip install pdfminer.six")  # doc: https://github.com/pdfminer/pdfminer.six
 
-SUPABASE_URL = os.environ.get("SUPABASE_URL","").rstrip("/")
-SRK          = os.environ.get("SUPABASE_SERVICE_ROLE_KEY","")
-
 OUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'docs', 'outbox')
 os.makedirs(OUT_DIR, exist_ok=True)
 
@@ -66,11 +64,8 @@ SECTION_HEADS = [
 def load_profile(user_id: str | None, profile_path: str | None) -> Dict:
     if profile_path:
         with open(profile_path) as f: return json.load(f)
-    if user_id and SUPABASE_URL and SRK:
-        url = f"{SUPABASE_URL}/rest/v1/profiles?id=eq.{user_id}&select=*"
-        r = requests.get(url, headers={"apikey": SRK, "Authorization": f"Bearer {SRK}"}, timeout=30)
-        r.raise_for_status()
-        arr = r.json() or []
+    if user_id and client().configured:
+        arr = client().get(f"profiles?id=eq.{user_id}&select=*")
         if arr: return arr[0]
     return {}
 
@@ -1,10 +1,13 @@
 # scripts/parse_resume.py
-import os, re, json, hashlib, requests, argparse
+import os, sys, re, hashlib, argparse
 from docx import Document
 from typing import Iterable, Set
 
-SUPABASE_URL = os.environ["SUPABASE_URL"].rstrip("/")
-SRK = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.core.postgrest import client
+
+if not client().configured:
+  raise SystemExit("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required")
 
 PHONE_RE = re.compile(r"(?:\+?1[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}")
 EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
@@ -66,19 +69,7 @@ def extract(docx_path: str):
   return {"full_name": name, "email": email, "phone": phone, "skills": skills}
 
 def patch_profile(user_id: str, profile: dict):
-  url = f"{SUPABASE_URL}/rest/v1/profiles?id=eq.{user_id}"
-  r = requests.patch(
-    url,
-    headers={
-      "Content-Type": "application/json",
-      "apikey": SRK,
-      "Authorization": f"Bearer {SRK}",
-      "Prefer": "return=minimal",
-    },
-    data=json.dumps(profile),
-    timeout=30,
-  )
-  r.raise_for_status()
+  client().patch(f"profiles?id=eq.{user_id}", profile)
 
 def sha1_of(path: str) -> str:
   h = hashlib.sha1()
@@ -1,19 +1,48 @@
 # scripts/rank.py (FULL REWRITE)
-import os, sys, json, requests, argparse
+import os, sys, json, requests, argparse, heapq, shutil, queue, threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
 # Make src importable
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.core.scoring import (
-    score_job, tokenize, contains_any, tokens_from_terms
+    CompiledProfile, compile_profile, score_jobs, score_matrix, tokenize, token_cache_stats
 )
+from src.core.index import JobIndex, db_watermark, hash_digest
+from src.core.store import job_store
+from src.core.postgrest import client
+from src.core.dedup import NearDupIndex, job_features, richness
 
 OUT_DIR   = os.path.join(os.path.dirname(__file__), '..', 'docs', 'data')
 OUT_JSON  = os.path.join(OUT_DIR, 'scores.json')
+TAIL_DIR  = os.path.join(OUT_DIR, 'scores.tail')
+# --all-users: data/rank/<uid>/scores.json (+ scores.tail/), each scores.json then
+# published to Storage outputs/<uid>/scores.json, the object the dashboard and
+# draft-covers read (the single-user workflow uploads docs/data/scores.json there)
+USERS_OUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'rank')
+OUTPUTS_BUCKET = "outputs"
 
-SUPABASE_URL = os.environ.get("SUPABASE_URL","").rstrip("/")
-SRK          = os.environ.get("SUPABASE_SERVICE_ROLE_KEY","")
+# Output: top K rows with only the fields the dashboard (and draft_email's shortlist) read;
+# descriptions stay in the DB. Jobs below RANK_MIN_SCORE are dropped outright.
+DASHBOARD_FIELDS = ('url_hash', 'title', 'company', 'location', 'url', 'posted_at', 'source')
+RANK_TOP_K      = max(1, int(os.getenv("RANK_TOP_K", "500")))
+RANK_MIN_SCORE  = float(os.getenv("RANK_MIN_SCORE", "0") or 0)
+RANK_TAIL_PAGE  = max(1, int(os.getenv("RANK_TAIL_PAGE", "500")))
+SCORE_CHUNK     = 500   # jobs per score_jobs call
+# scoring processes (1 = in-process; 0 = one per core)
+RANK_WORKERS    = int(os.getenv("RANK_WORKERS", "1") or 1)
+SCORED_FIELDS   = ('title', 'description', 'location')   # all a worker needs to see of a job
+# collapse near-duplicate postings (same job from several sources) to their richest record
+RANK_DEDUP      = str(os.getenv("RANK_DEDUP", "1")).strip().lower() not in ("", "0", "false", "no")
+# with dedup, the heap keeps top K x RANK_DEDUP_POOL candidates (at least 2x) and collapses them in place
+RANK_DEDUP_POOL = max(2, int(os.getenv("RANK_DEDUP_POOL", "2")))
+
+# Job reads: only the columns ranking uses, keyset-paged on url_hash
+JOB_COLUMNS = ("url_hash", "url", "title", "company", "location", "description",
+               "posted_at", "source", "closed_at")
+JOBS_PAGE   = max(1, int(os.getenv("RANK_PAGE_SIZE", "1000")))
 
 def _as_list(v):
     if v is None: return []
@@ -24,41 +53,208 @@ def _lower_set(v):
     return {str(x).lower() for x in _as_list(v) if x is not None}
 
 def get_profile(user_id: str) -> dict:
-    if not (SUPABASE_URL and SRK and user_id):
+    if not (client().configured and user_id):
         return {}
-    url = f"{SUPABASE_URL}/rest/v1/profiles?id=eq.{user_id}&select=*"
-    r = requests.get(url, headers={"apikey": SRK, "Authorization": f"Bearer {SRK}"}, timeout=30)
-    r.raise_for_status()
-    arr = r.json()
-    return (arr[0] if arr else {}) or {}
+    return client().get_one(f"profiles?id=eq.{user_id}&select=*")
+
+def get_profiles() -> list[dict]:
+    """Every profile row (for --all-users), paged by id."""
+    out, offset, PAGE = [], 0, 1000
+    while True:
+        rows = client().get(f"profiles?select=*&order=id.asc&limit={PAGE}&offset={offset}", timeout=60)
+        out.extend(rows)
+        if len(rows) < PAGE:
+            return out
+        offset += PAGE
+
+def _get_page(user_id: str | None, columns, after: tuple | None) -> list[dict]:
+    """
+    One keyset page: a user's jobs by url_hash, or (user_id=None) every user's
+    jobs by (url_hash, user_id) so copies of the same posting arrive together.
+    The client retries 429/5xx/network errors; a 4xx (bad column/filter) raises at once.
+    """
+    if user_id is not None:
+        path = (f"jobs?user_id=eq.{user_id}&select={','.join(columns)}"
+                f"&order=url_hash.asc&limit={JOBS_PAGE}")
+        if after:
+            path += f"&url_hash=gt.{after[0]}"
+    else:
+        path = (f"jobs?select=user_id,{','.join(columns)}"
+                f"&order=url_hash.asc,user_id.asc&limit={JOBS_PAGE}")
+        if after:
+            h, uid = after
+            path += f"&or=(url_hash.gt.{h},and(url_hash.eq.{h},user_id.gt.{uid}))"
+    return client().get(path, timeout=60)
 
-def get_jobs(user_id: str) -> list[dict]:
+def _stream_pages(user_id: str | None):
     """
-    Prefer DB 'jobs'; fall back to data/jobs.jsonl if any issue.
+    Keyset pages of the user's jobs (url_hash=gt.<last>; every user's with
+    user_id=None), fetched one page ahead in a background thread so scoring
+    runs while the next page downloads.
     """
+    pages: queue.Queue = queue.Queue(maxsize=2)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch():
+        columns = JOB_COLUMNS
+        after = None
+        try:
+            while True:
+                try:
+                    rows = _get_page(user_id, columns, after)
+                except requests.HTTPError as e:
+                    # tables without the incremental-crawl columns reject closed_at
+                    if after is None and "closed_at" in columns and e.response is not None \
+                            and e.response.status_code == 400:
+                        print("jobs.closed_at not available; fetching without it")
+                        columns = tuple(c for c in columns if c != "closed_at")
+                        continue
+                    raise
+                if rows and not put(rows):
+                    return
+                if len(rows) < JOBS_PAGE:
+                    break
+                after = (rows[-1]["url_hash"], rows[-1].get("user_id"))
+        except Exception as e:
+            put(e)
+            return
+        put(None)
+
+    threading.Thread(target=fetch, name="jobs-prefetch", daemon=True).start()
     try:
-        url = f"{SUPABASE_URL}/rest/v1/jobs?user_id=eq.{user_id}&select=*"
-        r = requests.get(url, headers={"apikey": SRK, "Authorization": f"Bearer {SRK}"}, timeout=60)
-        r.raise_for_status()
-        arr = r.json() or []
-        if arr: return arr
+        while (page := pages.get()) is not None:
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        stop.set()
+
+def _read_store(user_id: str):
+    store = job_store()
+    if store is not None:
+        yield from store.iter_jobs(user_id, columns=JOB_COLUMNS)
+
+def get_jobs(user_id: str, on_fallback=None):
+    """
+    Stream the user's jobs from the DB page by page; fall back to the local
+    job store (and say so, calling on_fallback()) when the DB is unreachable
+    or has none. A failure after rows have already been handed out is raised,
+    not papered over.
+    """
+    n = 0
+    try:
+        for page in _stream_pages(user_id):
+            n += len(page)
+            yield from page
+    except Exception as e:
+        if n:
+            raise
+        print(f"Jobs fetch failed ({e.__class__.__name__}: {e}); falling back to the local job store")
+    else:
+        if n:
+            return
+        print(f"No jobs in DB for {user_id}; falling back to the local job store")
+    if on_fallback is not None:
+        on_fallback()
+    yield from _read_store(user_id)
+
+def open_jobs_digest(user_id: str) -> str | None:
+    """hash_digest() of the user's open url_hashes (a url_hash-only keyset scan); None if the DB can't say."""
+    def hashes():
+        after = None
+        while True:
+            path = f"jobs?user_id=eq.{user_id}&closed_at=is.null&select=url_hash&order=url_hash.asc&limit={JOBS_PAGE}"
+            rows = client().get(path + (f"&url_hash=gt.{after}" if after else ""), timeout=60)
+            for r in rows:
+                yield r["url_hash"]
+            if len(rows) < JOBS_PAGE:
+                return
+            after = rows[-1]["url_hash"]
+    try:
+        return hash_digest(hashes())
     except Exception:
-        pass
+        return None
 
-    # fallback
-    p = os.path.join(os.path.dirname(__file__), '..', 'data', 'jobs.jsonl')
+def get_jobs_by_hash(user_id: str, url_hashes) -> list[dict]:
+    """Fetch just these jobs (index candidates), in url_hash=in.(...) chunks, in url_hash order like a full scan."""
     out = []
-    if os.path.exists(p):
-        with open(p) as f:
-            for line in f:
-                try: out.append(json.loads(line))
-                except Exception: pass
+    hashes = sorted(url_hashes)
+    CHUNK = 100  # keep the in.(...) filter well under URL length limits
+    for i in range(0, len(hashes), CHUNK):
+        chunk = ",".join(hashes[i:i+CHUNK])
+        out.extend(client().get(f"jobs?user_id=eq.{user_id}&url_hash=in.({chunk})"
+                                f"&select={','.join(JOB_COLUMNS)}&order=url_hash.asc", timeout=60))
     return out
 
-def _within_recency(job, profile) -> bool:
-    pol = (profile or {}).get("search_policy", {}) or {}
-    days = int(pol.get("recency_days", 0) or 0)
-    require = bool(pol.get("require_posted_date", False))
+def _recency_cutoff(cp: CompiledProfile) -> str | None:
+    if cp.recency_days <= 0:
+        return None
+    return (datetime.utcnow().date() - timedelta(days=cp.recency_days)).isoformat()
+
+def _reindexing(user_id: str, mark: list):
+    """
+    get_jobs() while building a fresh index over what it yields; saved (as
+    synced to `mark`) only if the DB served every row, not the local store.
+    """
+    index = JobIndex(user_id)
+    fell_back = []
+    for j in get_jobs(user_id, on_fallback=lambda: fell_back.append(True)):
+        if j.get("url_hash") and not j.get("closed_at"):
+            index.add(j["url_hash"], j.get("title") or "", j.get("posted_at"))
+        yield j
+    if not fell_back and len(index):
+        index.synced = mark
+        index.save()
+        print(f"Index: rebuilt over {len(index)} open jobs")
+
+def load_candidates(user_id: str, cp: CompiledProfile):
+    """
+    Jobs that can pass the title/recency gates, as an iterable. With an index
+    in step with the DB (same watermark as when it was last verified, or else
+    the same open-job count and url_hash digest) only its candidates are
+    fetched; otherwise every job is streamed as before and the index rebuilt
+    on the way.
+    """
+    index = JobIndex.load(user_id)
+    mark = db_watermark(user_id) if client().configured and user_id else None
+    n_db = mark[0] if mark else None
+    # the watermark is two small requests; the digest (every open url_hash) is
+    # read only when the watermark moved but the counts still agree
+    in_step = bool(n_db) and len(index) == n_db and (
+        index.synced == mark or open_jobs_digest(user_id) == index.digest())
+    if in_step and index.synced != mark:
+        index.synced = mark
+        try:
+            index.save()
+        except OSError:
+            pass   # verified again (digest) next run
+    if in_step:
+        hashes = index.candidates(cp.titles, _recency_cutoff(cp), include_undated=not cp.require_posted_date)
+        # a wide candidate set is cheaper as one scan than as many in.(...) requests
+        if len(hashes) <= n_db // 2:
+            try:
+                raw = get_jobs_by_hash(user_id, hashes)
+                print(f"Index: {len(hashes)}/{n_db} candidates")
+                return raw
+            except Exception as e:
+                print(f"Index fetch failed ({e}); scanning all jobs")
+        return get_jobs(user_id)
+    if not n_db:   # DB unreachable or empty: nothing to index (rows may come from the local store)
+        return get_jobs(user_id)
+    return _reindexing(user_id, mark)
+
+def _within_recency(job, cp: CompiledProfile) -> bool:
+    days = cp.recency_days
+    require = cp.require_posted_date
     if days <= 0:
         return True
     posted = (job or {}).get("posted_at")
@@ -71,61 +267,414 @@ def _within_recency(job, profile) -> bool:
     cutoff = (datetime.utcnow().date() - timedelta(days=days))
     return pdate >= cutoff
 
-def _title_gate(job, profile) -> bool:
-    tts = tokens_from_terms((profile or {}).get('target_titles'))
-    if not tts:
+def _title_gate(job, cp: CompiledProfile) -> bool:
+    if not cp.titles:
         return True
-    return bool(tts & tokenize(job.get('title','') or ''))
+    return bool(cp.titles & tokenize(job.get('title','') or ''))
 
-def main(user_id: str):
-    profile = get_profile(user_id)
-    raw = get_jobs(user_id)
+def _parts_or_none(job, cp: CompiledProfile):
+    """Score one job on its own so a malformed row can't sink the whole batch."""
+    try:
+        return score_jobs([job], cp, with_parts=True)[0]
+    except Exception:
+        return None
 
-    # filter
-    filtered = [j for j in raw if _within_recency(j, profile) and _title_gate(j, profile)]
+def _compact(job, parts) -> dict:
+    row = {k: job.get(k) for k in DASHBOARD_FIELDS}
+    if parts is None:
+        row['score'] = 0.0
+    else:
+        row['skill_overlap'], row['title_similarity'], row['loc_boost'], row['score'] = parts
+    return row
 
-    out = []
-    for j in filtered:
-        so = ts = lb = 0.0
-        try:
-            # decompose parts using the same logic your UI may want to show
-            title = j.get('title','') or ''
-            desc  = j.get('description','') or ''
-            loc   = j.get('location','') or ''
-
-            job_tokens = tokenize(title) | tokenize(desc)
-
-            skill_tokens = tokens_from_terms(profile.get('skills'))
-            target_title_tokens = tokens_from_terms(profile.get('target_titles'))
-
-            so = round(len(skill_tokens & job_tokens) / max(1, len(skill_tokens)), 4)
-            ts = round(len(target_title_tokens & tokenize(title)) / max(1, len(target_title_tokens)), 4)
-
-            loc_boost = 0.0
-            loc_terms = tokens_from_terms(profile.get('locations'))
-            if loc_terms and (loc_terms & tokenize(f"{loc} {desc}")):
-                loc_boost = 0.1
-            elif contains_any(loc, {"virginia","va","east coast","eastern time","et","est"}):
-                loc_boost = 0.1
-            lb = round(loc_boost, 4)
-
-            j['skill_overlap']   = so
-            j['title_similarity'] = ts
-            j['loc_boost']       = lb
-            j['score']           = score_job(j, profile)
-        except Exception:
-            j['score'] = 0.0
-
-        out.append(j)
-
-    out.sort(key=lambda x: x.get('score', 0), reverse=True)
-    os.makedirs(OUT_DIR, exist_ok=True)
-    with open(OUT_JSON, 'w') as f:
-        json.dump(out, f, indent=2)
-    print(f"Ranked {len(out)} jobs -> {OUT_JSON}")
+class TopK:
+    """
+    Bounded min-heap of the K best rows. Ties keep input order (same result as
+    a stable sort by score, truncated). push() returns the (score, -seq, row)
+    item that fell out, if any, so the caller can keep a tail.
+    """
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []   # (score, -seq, row): the root is the worst kept row
+        self._seq = 0
+
+    def push(self, score: float, row: dict):
+        item = (score, -self._seq, row)
+        self._seq += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+            return None
+        if item[:2] > self._heap[0][:2]:
+            return heapq.heapreplace(self._heap, item)
+        return item
+
+    def rows(self) -> list[dict]:
+        return [r for _, _, r in sorted(self._heap, key=lambda x: (-x[0], -x[1]))]
+
+    def items(self) -> list[tuple]:
+        return list(self._heap)
+
+    def full(self) -> bool:
+        return len(self._heap) >= self.k
+
+    def accepts(self, score: float) -> bool:
+        """Whether push(score, ...) would keep the row (a tie with the worst kept row loses to it)."""
+        return len(self._heap) < self.k or score > self._heap[0][0]
+
+    def replace(self, items: list[tuple]):
+        """Swap in a subset of items() (e.g. after dropping duplicates); seq numbering carries on."""
+        self._heap = list(items)
+        heapq.heapify(self._heap)
+
+def _chunks(items, n: int):
+    chunk = []
+    for x in items:
+        chunk.append(x)
+        if len(chunk) >= n:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _score_chunk(jobs, cp: CompiledProfile):
+    try:
+        return score_jobs(jobs, cp, with_parts=True)
+    except Exception:
+        return [_parts_or_none(j, cp) for j in jobs]
+
+def _matrix_chunk(jobs, cps, mask):
+    try:
+        return score_matrix(jobs, cps, mask)
+    except Exception:
+        return [{p: _parts_or_none(j, cps[p]) for p in m} for j, m in zip(jobs, mask)]
+
+# Process-pool workers get the compiled profile(s) once, via the initializer,
+# and exchange only slim jobs and score tuples with the parent.
+_worker_cps: list = []
+
+def _init_worker(cps):
+    global _worker_cps
+    _worker_cps = cps
+
+def _score_chunk_worker(jobs):
+    return _score_chunk(jobs, _worker_cps[0])
+
+def _matrix_chunk_worker(args):
+    jobs, mask = args
+    return _matrix_chunk(jobs, _worker_cps, mask)
+
+def _slim(job) -> dict:
+    return {k: job.get(k) for k in SCORED_FIELDS}
+
+def _pool_map(fn, items, cps, workers: int):
+    """
+    (key, fn(payload)) for each (key, payload) in items, run in a process pool
+    and yielded in input order (deterministic output whatever finishes first);
+    at most 2 x workers chunks are in flight, so the input can stay a stream.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cps,)) as ex:
+        pending = deque()
+        for key, payload in items:
+            pending.append((key, ex.submit(fn, payload)))
+            if len(pending) >= 2 * workers:
+                k, fut = pending.popleft()
+                yield k, fut.result()
+        while pending:
+            k, fut = pending.popleft()
+            yield k, fut.result()
+
+def _workers(n: int) -> int:
+    return (os.cpu_count() or 1) if n <= 0 else n
+
+def _score_stream(jobs, cp: CompiledProfile, workers: int = 1):
+    """(job, parts) for each job in input order, scored SCORE_CHUNK at a time (sharded over processes with workers > 1)."""
+    chunks = _chunks(jobs, SCORE_CHUNK)
+    if workers > 1:
+        scored = _pool_map(_score_chunk_worker, ((c, [_slim(j) for j in c]) for c in chunks), [cp], workers)
+    else:
+        scored = ((c, _score_chunk(c, cp)) for c in chunks)
+    for chunk, parts in scored:
+        yield from zip(chunk, parts)
+
+def _write_json(path: str, obj):
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+def _write_tail(tail: list, page_size: int, tail_dir: str = TAIL_DIR):
+    """Rows ranked below the top K, best first, as scores.tail/page-NNNN.json + index.json."""
+    shutil.rmtree(tail_dir, ignore_errors=True)
+    os.makedirs(tail_dir, exist_ok=True)
+    tail.sort(key=lambda x: (-x[0], -x[1]))
+    pages = 0
+    for i in range(0, len(tail), page_size):
+        pages += 1
+        _write_json(os.path.join(tail_dir, f'page-{pages:04d}.json'), [r for _, _, r in tail[i:i+page_size]])
+    _write_json(os.path.join(tail_dir, 'index.json'), {"total": len(tail), "page_size": page_size, "pages": pages})
+
+def _collapse(items: list) -> tuple[list, int]:
+    """
+    (score, -seq, (row, features, richness)) candidates -> the richest item of
+    each near-duplicate cluster, and how many were dropped.
+    """
+    items = sorted(items, key=lambda x: -x[1])   # arrival order: cluster roots follow first appearance
+    index = NearDupIndex()
+    docs = [index.add_doc(feat) for _, _, (_, feat, _) in items]
+    best = {}
+    for doc, item in zip(docs, items):
+        root = index.find(doc)
+        if root not in best or item[2][2] > best[root][2][2]:
+            best[root] = item
+    return list(best.values()), len(items) - len(best)
+
+class Ranking:
+    """
+    One user's output: the top-K heap, the optional tail and the counters.
+    With a local job store, every (url_hash, parts) goes to it SCORE_CHUNK at
+    a time (the first chunk replaces the user's earlier scores).
+
+    With dedup, the heap holds top_k x RANK_DEDUP_POOL candidates, each with
+    its dedup features, so memory stays bounded. Features are only signed for
+    rows the heap will take (or the tail keeps), not for every scored job.
+    A full heap is collapsed in
+    place (each cluster keeps its richest copy) before it evicts anything, at
+    most once per quarter-heap of pushes, so it never holds fewer than top_k
+    distinct postings; write() collapses once more, tail included, and takes
+    the top K. A cluster whose richer copy scored too low to stay in the heap
+    is represented by the copy that did.
+    """
+    def __init__(self, top_k: int, min_score: float, tail: bool, store=None, user_id: str | None = None,
+                 dedup: bool = False):
+        self.k = top_k
+        self.dedup = dedup
+        self.top = TopK(top_k * RANK_DEDUP_POOL if dedup else top_k)
+        self.min_score = min_score
+        self.rest = [] if tail else None
+        self.store, self.user_id = store, user_id
+        self.scores = [] if store is not None else None
+        self._scores_replaced = False
+        self.scored = self.pruned = self.dropped = 0
+        self._since_compact = 0
+
+    def add(self, job, parts, features=None):
+        """
+        Score one job. `features`, when given, is a callable returning its
+        job_features(), memoized so users sharing a posting sign it once.
+        """
+        self.scored += 1
+        if self.scores is not None and job.get('url_hash'):
+            self.scores.append((job['url_hash'], parts))
+            if len(self.scores) >= SCORE_CHUNK:
+                self.store_scores()
+        score = 0.0 if parts is None else parts[3]
+        if score < self.min_score:
+            self.pruned += 1
+            return
+        if self.dedup:
+            self._since_compact += 1
+            if self.top.full() and self._since_compact >= max(1, self.top.k // 4):
+                items, dropped = _collapse(self.top.items())
+                self.top.replace(items)
+                self.dropped += dropped
+                self._since_compact = 0
+            if self.rest is None and not self.top.accepts(score):
+                return   # would fall straight out of the heap: no need to sign it
+            row = (_compact(job, parts), features() if features is not None else job_features(job), richness(job))
+        else:
+            row = _compact(job, parts)
+        out = self.top.push(score, row)
+        if out is not None and self.rest is not None:
+            self.rest.append(out)
+
+    def _final(self) -> list[dict]:
+        """The top K rows; with dedup, collapses first and leaves what's below K in rest."""
+        if not self.dedup:
+            return self.top.rows()
+        items, dropped = _collapse(self.top.items() + (self.rest or []))
+        self.dropped += dropped
+        items = [(score, nseq, row) for score, nseq, (row, _, _) in sorted(items, key=lambda x: (-x[0], -x[1]))]
+        if self.rest is not None:
+            self.rest = items[self.k:]
+        return [r for _, _, r in items[:self.k]]
+
+    def write(self, out_json: str, tail_dir: str) -> int:
+        os.makedirs(os.path.dirname(out_json), exist_ok=True)
+        rows = self._final()
+        _write_json(out_json, rows)
+        if self.rest is not None:
+            _write_tail(self.rest, RANK_TAIL_PAGE, tail_dir)
+        elif os.path.isdir(tail_dir):
+            shutil.rmtree(tail_dir, ignore_errors=True)   # don't leave a tail from an older run
+        return len(rows)
+
+    def store_scores(self):
+        """Send the scores held so far to the local job store (the first call replaces the user's old ones)."""
+        if self.scores is None:
+            return
+        self.store.put_scores(self.user_id, self.scores, replace=not self._scores_replaced)
+        self._scores_replaced = True
+        self.scores = []
+
+def _print_token_stats():
+    ts = token_cache_stats()
+    print(f"Token cache: hits={ts['hits']} misses={ts['misses']} size={ts['size']} vocab={ts['vocab']}")
+
+def main(user_id: str, top_k: int = RANK_TOP_K, min_score: float = RANK_MIN_SCORE, tail: bool = False,
+         workers: int = RANK_WORKERS, dedup: bool = RANK_DEDUP):
+    # token sets, location matchers and recency policy are derived once here
+    cp = compile_profile(get_profile(user_id))
+    raw = load_candidates(user_id, cp)
+
+    # filter (closed_at is stamped by incremental crawls when a posting vanishes)
+    filtered = (j for j in raw if not j.get('closed_at')
+                and _within_recency(j, cp) and _title_gate(j, cp))
+
+    # score in chunks and keep only the best top_k compact rows; the parts are
+    # what the UI shows next to each score
+    store = job_store()
+    ranking = Ranking(top_k, min_score, tail, store=store, user_id=user_id, dedup=dedup)
+    for j, p in _score_stream(filtered, cp, _workers(workers)):
+        ranking.add(j, p)
+
+    kept = ranking.write(OUT_JSON, TAIL_DIR)
+    if dedup:
+        print(f"Dedup: collapsed {ranking.dropped} near-duplicate postings")
+    ranking.store_scores()
+    print(f"Ranked {ranking.scored} jobs (pruned {ranking.pruned} below {min_score}) -> top {kept} in {OUT_JSON}")
+    if ranking.rest is not None:
+        print(f"Tail: {len(ranking.rest)} more jobs -> {TAIL_DIR}")
+    _print_token_stats()
+
+# ---------- --all-users: one pass over the shared pool ----------
+
+def user_out_dir(user_id: str) -> str:
+    return os.path.join(USERS_OUT_DIR, user_id)
+
+def publish_scores(user_id: str, path: str):
+    """Upload a user's scores.json to Storage outputs/<uid>/scores.json (what the dashboard reads)."""
+    with open(path, 'rb') as f:
+        client().upload(OUTPUTS_BUCKET, f"{user_id}/scores.json", f.read())
+
+def _once(fn, *args):
+    """fn(*args), computed on the first call only."""
+    memo = []
+    def get():
+        if not memo:
+            memo.append(fn(*args))
+        return memo[0]
+    return get
+
+def _shared_jobs(rows):
+    """
+    Rows arrive ordered by (url_hash, user_id); collapse the copies each user
+    stored of one posting into (job, {user_id: row}) so it is scored once.
+    Copies whose text differs (crawled at different times) stay separate jobs.
+    """
+    group, current = {}, None
+    for row in rows:
+        h = row.get("url_hash")
+        if h != current and group:
+            yield from group.values()
+            group = {}
+        current = h
+        key = (row.get("title"), row.get("location"), row.get("description"))
+        job, owners = group.setdefault(key, (row, {}))
+        owners[row.get("user_id")] = row
+    if group:
+        yield from group.values()
+
+def main_all(top_k: int = RANK_TOP_K, min_score: float = RANK_MIN_SCORE, tail: bool = False,
+             workers: int = RANK_WORKERS, dedup: bool = RANK_DEDUP, upload: bool = True):
+    """
+    Rank every user in one process: compile every profile, stream the whole
+    jobs table once and score each posting against all the profiles that hold
+    it (score_matrix: one jobs x profiles product per chunk). Each user's
+    scores.json is written under data/rank/<uid>/ and, with upload, published
+    to Storage outputs/<uid>/scores.json.
+    """
+    profiles = {p["id"]: p for p in get_profiles() if p.get("id")}
+    uids = sorted(profiles)
+    cps = [compile_profile(profiles[u]) for u in uids]
+    slot = {u: i for i, u in enumerate(uids)}
+    store = job_store()
+    rankings = [Ranking(top_k, min_score, tail, store=store, user_id=u, dedup=dedup) for u in uids]
+    indexes = [JobIndex(u) for u in uids]
+    workers = _workers(workers)
+    print(f"Ranking {len(uids)} users in one pass" + (f" ({workers} workers)" if workers > 1 else ""))
+
+    n_rows = 0
+    def gated():
+        """(job, {profile slot: that user's row}) for postings at least one user still wants scored."""
+        nonlocal n_rows
+        for job, owners in _shared_jobs(r for page in _stream_pages(None) for r in page):
+            wanted = {}
+            for uid, row in owners.items():
+                n_rows += 1
+                p = slot.get(uid)
+                if p is None or row.get("closed_at"):
+                    continue
+                indexes[p].add(row["url_hash"], row.get("title") or "", row.get("posted_at"))
+                if _within_recency(row, cps[p]) and _title_gate(row, cps[p]):
+                    wanted[p] = row
+            if wanted:
+                yield job, wanted
+
+    chunks = _chunks(gated(), SCORE_CHUNK)
+    if workers > 1:
+        scored = _pool_map(_matrix_chunk_worker,
+                           ((c, ([_slim(job) for job, _ in c], [list(w) for _, w in c])) for c in chunks),
+                           cps, workers)
+    else:
+        scored = ((c, _matrix_chunk([job for job, _ in c], cps, [list(w) for _, w in c])) for c in chunks)
+    for chunk, results in scored:
+        for (job, wanted), res in zip(chunk, results):
+            features = _once(job_features, job) if dedup else None   # signed on first use, shared by every user
+            for p, row in wanted.items():
+                rankings[p].add(row, res.get(p), features)
+
+    failed = 0
+    for u, ranking, index in zip(uids, rankings, indexes):
+        out_dir = user_out_dir(u)
+        out_json = os.path.join(out_dir, 'scores.json')
+        kept = ranking.write(out_json, os.path.join(out_dir, 'scores.tail'))
+        ranking.store_scores()
+        index.save()
+        dropped = f", {ranking.dropped} near-duplicates collapsed" if dedup else ""
+        published = ""
+        if upload:
+            try:
+                publish_scores(u, out_json)
+                published = f", published to {OUTPUTS_BUCKET}/{u}/scores.json"
+            except Exception as e:
+                failed += 1
+                published = f", upload failed: {e}"
+        print(f"  {u}: ranked {ranking.scored} (pruned {ranking.pruned}{dropped}) -> top {kept}{published}")
+    print(f"Scanned {n_rows} job rows for {len(uids)} users")
+    _print_token_stats()
+    if failed:
+        sys.exit(f"{failed} of {len(uids)} users' scores could not be published")
 
 if __name__ == '__main__':
     ap = argparse.ArgumentParser()
-    ap.add_argument('--user', required=True, help='Supabase user id')
+    who = ap.add_mutually_exclusive_group(required=True)
+    who.add_argument('--user', help='Supabase user id')
+    who.add_argument('--all-users', action='store_true',
+                     help='rank every profile in one pass; writes data/rank/<uid>/scores.json per user '
+                          'and uploads it to Storage outputs/<uid>/scores.json')
+    ap.add_argument('--top', type=int, default=RANK_TOP_K, help='jobs kept in scores.json (RANK_TOP_K)')
+    ap.add_argument('--min-score', type=float, default=RANK_MIN_SCORE, help='drop jobs scoring below this (RANK_MIN_SCORE)')
+    ap.add_argument('--tail', action='store_true', help='also write jobs past --top to docs/data/scores.tail/ pages')
+    ap.add_argument('--workers', type=int, default=RANK_WORKERS,
+                    help='scoring processes (RANK_WORKERS; 1 = in-process, 0 = one per core)')
+    ap.add_argument('--no-dedup', dest='dedup', action='store_false', default=RANK_DEDUP,
+                    help='keep near-duplicate postings from different sources (RANK_DEDUP=0)')
+    ap.add_argument('--no-upload', dest='upload', action='store_false',
+                    help='--all-users: write data/rank/<uid>/ only, without publishing to Storage')
     args = ap.parse_args()
-    main(args.user)
+    opts = dict(top_k=max(1, args.top), min_score=args.min_score, tail=args.tail,
+                workers=args.workers, dedup=args.dedup)
+    if args.all_users:
+        main_all(upload=args.upload, **opts)
+    else:
+        main(args.user, **opts)
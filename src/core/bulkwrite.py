@@ -0,0 +1,210 @@
+# src/core/bulkwrite.py
+"""
+Bulk JSON writer for PostgREST upserts (public.jobs and friends).
+
+Rows are serialized once and packed into chunks by payload bytes rather than
+row count (descriptions make rows anywhere from 1 to 50 KB). Chunks go over a
+pooled keep-alive session, with up to BULK_IN_FLIGHT chunks in flight;
+429/5xx and network errors are retried with exponential backoff (Retry-After
+wins when given). A 413 splits the chunk in half and caps the byte target
+below that chunk's size for the rest of the writer's life; other 4xx answers
+are data errors and are raised as they are.
+
+gzip request bodies are opt-in (BULK_GZIP=1): PostgREST itself does not
+decode Content-Encoding on requests, so only enable it behind a gateway that
+does. If the server refuses one anyway (415, or PostgREST's PGRST102
+"invalid body" 400), the chunk is resent plain once and gzip stays off for
+the writer.
+
+The byte target adapts: a chunk that took longer than SLOW_CHUNK_S halves
+it, a quick one grows it by half, within [MIN_TARGET, ceiling].
+
+Env:
+  BULK_TARGET_KB   default 512 (uncompressed JSON per chunk to start with)
+  BULK_MAX_ROWS    default 1000
+  BULK_IN_FLIGHT   default 3
+  BULK_RETRIES     default 4
+  BULK_GZIP=1      gzip request bodies (default off)
+"""
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MIN_TARGET = 64 * 1024
+MAX_TARGET = 8 * 1024 * 1024
+SLOW_CHUNK_S = 8.0
+FAST_CHUNK_S = 2.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def _gzip_refused(r: requests.Response) -> bool:
+    """Whether the answer to a gzip body means 'can't read it' rather than a data error."""
+    if r.status_code == 415:
+        return True
+    if r.status_code == 400:
+        try:
+            return (r.json() or {}).get("code") == "PGRST102"   # PostgREST: empty or invalid JSON body
+        except (ValueError, AttributeError):
+            return False
+    return False
+
+def _env_flag(name: str, default: bool = True) -> bool:
+    return str(os.getenv(name, "1" if default else "0")).strip().lower() not in ("", "0", "false", "no")
+
+@dataclass
+class ChunkStat:
+    rows: int
+    raw_bytes: int
+    sent_bytes: int
+    seconds: float
+    attempts: int
+    gzip: bool
+
+def pooled_session(pool_size: int = 8) -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+class BulkWriter:
+    def __init__(self, url: str, headers: Dict[str, str], session: Optional[requests.Session] = None,
+                 target_bytes: Optional[int] = None, max_rows: Optional[int] = None,
+                 in_flight: Optional[int] = None, retries: Optional[int] = None,
+                 use_gzip: Optional[bool] = None, timeout: float = 60):
+        self.url = url
+        self.headers = {**headers, "Content-Type": "application/json"}
+        self.in_flight = max(1, in_flight or int(os.getenv("BULK_IN_FLIGHT", "3")))
+        self.session = session or pooled_session(self.in_flight + 1)
+        self.target = min(MAX_TARGET, max(MIN_TARGET, target_bytes or int(os.getenv("BULK_TARGET_KB", "512")) * 1024))
+        self.max_rows = max(1, max_rows or int(os.getenv("BULK_MAX_ROWS", "1000")))
+        self.retries = max(0, retries if retries is not None else int(os.getenv("BULK_RETRIES", "4")))
+        self.gzip = _env_flag("BULK_GZIP", False) if use_gzip is None else use_gzip
+        self.ceiling = MAX_TARGET   # lowered by 413s: the server's body limit
+        self.timeout = timeout
+        self.stats: List[ChunkStat] = []
+        self._lock = threading.Lock()
+
+    def _chunks(self, rows: Iterable[Dict]):
+        """Chunks of serialized rows, cut at the byte target current when each is packed."""
+        parts, size = [], 2
+        for row in rows:
+            b = json.dumps(row, separators=(",", ":")).encode("utf-8")
+            if parts and (size + len(b) + 1 > self.target or len(parts) >= self.max_rows):
+                yield parts
+                parts, size = [], 2
+            parts.append(b)
+            size += len(b) + 1
+        if parts:
+            yield parts
+
+    def _backoff(self, attempt: int, r: Optional[requests.Response]):
+        wait = None
+        if r is not None:
+            try:
+                wait = float(r.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                wait = None
+        if wait is None:
+            wait = min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random())
+        time.sleep(wait)
+
+    def _send(self, parts: List[bytes]) -> List[ChunkStat]:
+        """POST one chunk (split in half on 413); the stats of what was sent."""
+        body = b"[" + b",".join(parts) + b"]"
+        n = len(parts)
+        t0 = time.monotonic()
+        attempt = 0
+        while True:
+            use_gzip = self.gzip
+            headers = self.headers
+            data = body
+            if use_gzip:
+                data = gzip.compress(body, compresslevel=5)
+                headers = {**headers, "Content-Encoding": "gzip"}
+            r = None
+            try:
+                r = self.session.post(self.url, headers=headers, data=data, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+            else:
+                if use_gzip and _gzip_refused(r):
+                    with self._lock:
+                        if self.gzip:
+                            self.gzip = False
+                            print(f"  bulk write: server refused a gzip body ({r.status_code}); sending plain JSON")
+                    continue
+                if r.status_code == 413 and n > 1:
+                    with self._lock:
+                        self.ceiling = max(MIN_TARGET, min(self.ceiling, len(body) // 2))
+                        self.target = min(self.target, self.ceiling)
+                    print(f"  bulk write: {len(body) // 1024} KiB chunk too large (413); splitting it")
+                    return self._send(parts[:n // 2]) + self._send(parts[n // 2:])
+                if r.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    r.raise_for_status()
+                    stat = ChunkStat(n, len(body), len(data), time.monotonic() - t0, attempt + 1, use_gzip)
+                    self._adapt(stat)
+                    return [stat]
+            self._backoff(attempt, r)
+            attempt += 1
+
+    def _adapt(self, stat: ChunkStat):
+        with self._lock:
+            self.stats.append(stat)
+            if stat.seconds > SLOW_CHUNK_S:
+                self.target = max(MIN_TARGET, self.target // 2)
+            elif stat.seconds < FAST_CHUNK_S and stat.raw_bytes >= self.target // 2:
+                self.target = min(self.ceiling, int(self.target * 1.5))
+
+    def write(self, rows: Iterable[Dict]) -> List[ChunkStat]:
+        """
+        Send every row; returns this call's chunk stats in order. The first
+        chunk that still fails after its retries is raised once the chunks in
+        flight have finished.
+        """
+        out: List[ChunkStat] = []
+        error: Optional[BaseException] = None
+        pending = deque()
+
+        def settle(fut):
+            nonlocal error
+            try:
+                out.extend(fut.result())
+            except Exception as e:
+                error = error or e
+
+        with ThreadPoolExecutor(max_workers=self.in_flight) as ex:
+            for parts in self._chunks(rows):
+                if error is not None:
+                    break
+                pending.append(ex.submit(self._send, parts))
+                if len(pending) >= self.in_flight:
+                    settle(pending.popleft())
+            while pending:
+                settle(pending.popleft())
+        if error is not None:
+            raise error
+        return out
+
+    def summary(self) -> str:
+        st = self.stats
+        if not st:
+            return "no chunks sent"
+        rows = sum(s.rows for s in st)
+        raw = sum(s.raw_bytes for s in st)
+        sent = sum(s.sent_bytes for s in st)
+        secs = [s.seconds for s in st]
+        retried = sum(1 for s in st if s.attempts > 1)
+        return (f"{len(st)} chunks, {rows} rows, {raw / 1024:.0f} KiB -> {sent / 1024:.0f} KiB sent "
+                f"({raw / max(1, sent):.1f}x), chunk s avg={sum(secs) / len(secs):.2f} max={max(secs):.2f}, "
+                f"retried={retried}, target={self.target // 1024} KiB")
@@ -0,0 +1,188 @@
+# src/core/dedup.py
+"""
+Near-duplicate postings: the same job reached through Greenhouse, LinkedIn and
+Indeed under different URLs.
+
+Every job gets
+  - a MinHash signature of its description's word 3-shingles, built with
+    one-permutation hashing (each shingle is hashed once into one of NUM_PERM
+    bins), so signing is linear in the text;
+  - a blocking key: normalized company + title tokens.
+LSH bands over the signature (scoped to the company) and the blocking key
+propose candidates; a candidate is a duplicate when the companies agree,
+the locations don't conflict, and either the descriptions' estimated Jaccard
+similarity clears the threshold (stricter when the titles differ) or, when one
+side has only a snippet (or a much shorter text), the titles match. That
+title-only rule needs more: the records must come from different sources or
+URL hosts (one board lists distinct openings under the same title) and both
+locations must be known and overlap ("Remote" alone reduces to no tokens,
+which is unknown, not a match).
+
+Clusters are kept with union-find, so adding n jobs is roughly O(n).
+
+Env:
+  DEDUP_THRESHOLD   default 0.6 (estimated description Jaccard for same-title jobs)
+"""
+import os
+import re
+import zlib
+from urllib.parse import urlparse
+from array import array
+from typing import Dict, List, Optional
+
+from src.core.scoring import tokenize
+
+try:
+    import numpy as np
+except Exception:  # optional: pure-Python signing below gives identical signatures
+    np = None
+
+NUM_PERM = 64
+BANDS = 16                      # 16 bands x 4 rows: candidates from ~0.5 Jaccard up
+ROWS = NUM_PERM // BANDS
+MAX_WORDS = 400                 # shingle only the head of long descriptions
+MIN_SHINGLES = 50               # shorter texts (list-page snippets) get no signature
+LENGTH_RATIO = 0.5              # texts this uneven are a snippet vs the full posting: compare titles
+MAX_CANDIDATES = 64             # members checked per lookup (boilerplate-heavy buckets)
+TITLE_SIM = 0.8
+DIFFERENT_TITLE_SIM = 0.9       # description similarity needed when titles disagree
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.6") or 0.6)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_EMPTY = 0xFFFFFFFF
+_MAX_CHARS = MAX_WORDS * 16     # enough text for MAX_WORDS words, so the regex never scans a whole posting
+_P1, _P2 = 0x9E3779B1, 0x85EBCA77   # shingle hash = w0*P1 + w1*P2 + w2 (mod 2^32) over word crc32s
+_COMPANY_NOISE = {"the", "inc", "llc", "ltd", "corp", "co", "company", "gmbh", "plc", "hq"}
+_LOCATION_NOISE = {"remote", "hybrid", "onsite", "on", "site", "us", "usa", "united", "states", "or", "and"}
+
+def company_key(company: str) -> str:
+    """'Scale AI, Inc.' / 'scale-ai' -> 'scaleai'."""
+    return "".join(w for w in _WORD_RE.findall((company or "").lower()) if w not in _COMPANY_NOISE)
+
+def _location_tokens(location: str) -> frozenset:
+    return frozenset(w for w in _WORD_RE.findall((location or "").lower()) if w not in _LOCATION_NOISE)
+
+def _origin(source: str, url: str) -> tuple:
+    host = urlparse((url or "").strip().lower()).netloc
+    return ((source or "").strip().lower(), host[4:] if host.startswith("www.") else host)
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall((text or "")[:_MAX_CHARS].lower())[:MAX_WORDS]
+
+def _signature(words: List[str]) -> Optional[array]:
+    """One-permutation MinHash of the words' 3-shingles; None if there are too few."""
+    if len(words) - 2 < MIN_SHINGLES:
+        return None
+    wh = [zlib.crc32(w.encode()) for w in words]
+    if np is not None:
+        a = np.array(wh, dtype=np.uint64)
+        h = (a[:-2] * _P1 + a[1:-1] * _P2 + a[2:]) & 0xFFFFFFFF
+        mins = np.full(NUM_PERM, _EMPTY, dtype=np.uint64)
+        np.minimum.at(mins, h % NUM_PERM, h // NUM_PERM)
+        sig = array("I", mins.astype(np.uint32).tobytes())
+    else:
+        sig = array("I", [_EMPTY]) * NUM_PERM
+        for i in range(len(wh) - 2):
+            h = (wh[i] * _P1 + wh[i+1] * _P2 + wh[i+2]) & 0xFFFFFFFF
+            b, v = h % NUM_PERM, h // NUM_PERM
+            if v < sig[b]:
+                sig[b] = v
+    # densify: an empty bin borrows the next filled bin's value (offset by the distance)
+    for b in range(NUM_PERM):
+        if sig[b] == _EMPTY:
+            for d in range(1, NUM_PERM):
+                v = sig[(b + d) % NUM_PERM]
+                if v != _EMPTY:
+                    sig[b] = (v + d * 0x9E3779B1) & 0x7FFFFFFF
+                    break
+    return sig
+
+def similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(map(int.__eq__, a, b)) / NUM_PERM
+
+def _overlap(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def richness(job) -> int:
+    """How much a record carries: description length, plus a little for a posting date and location."""
+    return (len(job.get("description") or "")
+            + (50 if job.get("posted_at") else 0)
+            + (10 if job.get("location") else 0))
+
+def job_features(job) -> tuple:
+    """What the index compares: (company key, title tokens, location tokens, signature, word count, origin)."""
+    words = _words(job.get("description") or "")
+    return (company_key(job.get("company") or ""), frozenset(tokenize(job.get("title") or "")),
+            _location_tokens(job.get("location") or ""), _signature(words), len(words),
+            _origin(job.get("source") or "", job.get("url") or ""))
+
+class NearDupIndex:
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self._docs: List[tuple] = []              # (company, title tokens, location tokens, signature, words, origin)
+        self._parent: List[int] = []
+        self._buckets: Dict[bytes, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def find(self, i: int) -> int:
+        """Cluster id (the root doc) of doc i."""
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # the earlier doc stays root, so cluster ids follow first appearance
+            if rb < ra:
+                ra, rb = rb, ra
+            self._parent[rb] = ra
+
+    def _is_dup(self, doc: tuple, other: tuple) -> bool:
+        company, title, loc, sig, n, origin = doc
+        o_company, o_title, o_loc, o_sig, o_n, o_origin = other
+        if company != o_company:
+            return False
+        if loc and o_loc and not (loc & o_loc):
+            return False
+        same_title = _overlap(title, o_title) >= TITLE_SIM
+        if sig is not None and o_sig is not None and min(n, o_n) >= LENGTH_RATIO * max(n, o_n):
+            return similarity(sig, o_sig) >= (self.threshold if same_title else DIFFERENT_TITLE_SIM)
+        # titles alone: only across sources/hosts, and only with known, overlapping locations
+        return (same_title and bool(company) and bool(loc & o_loc)
+                and (origin[0] != o_origin[0] or origin[1] != o_origin[1]))
+
+    def add_doc(self, doc: tuple) -> int:
+        """Index one job's job_features(); returns its doc id (see find() for its cluster)."""
+        company = doc[0]
+        i = len(self._docs)
+        self._docs.append(doc)
+        self._parent.append(i)
+
+        keys = []
+        if company and doc[1]:
+            keys.append(b"t:" + company.encode() + b":" + " ".join(sorted(doc[1])).encode())
+        if doc[3] is not None:
+            prefix = b"s:" + company.encode() + b":"
+            keys.extend(prefix + bytes([band]) + doc[3][band*ROWS:(band+1)*ROWS].tobytes()
+                        for band in range(BANDS))
+
+        checked = set()     # one member per cluster is checked
+        for key in keys:
+            bucket = self._buckets.setdefault(key, [])
+            for j in bucket[-MAX_CANDIDATES:]:
+                root = self.find(j)
+                if root in checked:
+                    continue
+                checked.add(root)
+                if root != self.find(i) and self._is_dup(doc, self._docs[j]):
+                    self._union(i, j)
+            bucket.append(i)
+        return i
@@ -0,0 +1,172 @@
+# src/core/index.py
+"""
+Per-user inverted index over stored (open) jobs, so rank can pull only the
+jobs that can pass its title and recency gates instead of scanning them all.
+
+  postings: title token -> url_hashes whose title has it (tokens from tokenize())
+  by_date:  [posted YYYY-MM-DD, url_hash] sorted, for recency range scans
+  docs:     url_hash -> [posted date or None, title tokens] (for updates/removals)
+
+crawl adds jobs as they persist and drops the ones it closes; rank trusts the
+index only while it covers exactly the DB's open jobs and rebuilds it
+otherwise. Checking that is cheap in the common case: `synced` holds the
+db_watermark() (open-job count plus the newest boards.last_crawled_at, which
+every crawl moves when it finishes) the index was last verified against, and a
+crawl that started from a verified index carries it forward. Only when the
+watermark has moved does rank compare the digest of every open url_hash (a
+close here plus an open elsewhere keeps the count but changes the digest).
+
+Env:
+  JOB_INDEX_DIR   default data/index (one <user_id>.json per user)
+"""
+import hashlib
+import json
+import os
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.core.postgrest import client
+from src.core.scoring import tokenize
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+INDEX_VERSION = 1
+
+def index_path(user_id: str) -> str:
+    root = os.getenv("JOB_INDEX_DIR") or os.path.join(ROOT, "data", "index")
+    return os.path.join(root, f"{user_id}.json")
+
+def hash_digest(url_hashes_sorted: Iterable[str]) -> str:
+    """Digest of a set of url_hashes, fed in ascending order (how the DB pages them)."""
+    h = hashlib.sha1()
+    for u in url_hashes_sorted:
+        h.update(u.encode("ascii", "replace") + b"\n")
+    return h.hexdigest()
+
+def db_watermark(user_id: str) -> Optional[list]:
+    """
+    [open job count, newest boards.last_crawled_at] for the user: two small
+    requests that move whenever a crawl writes jobs; None if the DB can't say.
+    """
+    try:
+        n = client().head_count(f"jobs?user_id=eq.{user_id}&closed_at=is.null&select=url_hash")
+        rows = client().get("boards?select=last_crawled_at&last_crawled_at=not.is.null"
+                            "&order=last_crawled_at.desc&limit=1")
+    except Exception:
+        return None
+    if n is None:
+        return None
+    return [n, (rows[0].get("last_crawled_at") if rows else None)]
+
+def _posted_date(posted) -> Optional[str]:
+    """YYYY-MM-DD if posted_at parses the way rank's recency gate reads it, else None."""
+    if not posted:
+        return None
+    try:
+        return datetime.strptime(str(posted)[:10], "%Y-%m-%d").date().isoformat()
+    except Exception:
+        return None
+
+class JobIndex:
+    def __init__(self, user_id: str, path: Optional[str] = None):
+        self.user_id = user_id
+        self.path = path or index_path(user_id)
+        self.docs: Dict[str, list] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self.by_date: List[list] = []
+        self.undated: Set[str] = set()
+        self.synced: Optional[list] = None   # db_watermark() the index was last known to match
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def digest(self) -> str:
+        """hash_digest() of the indexed url_hashes."""
+        return hash_digest(sorted(self.docs))
+
+    @classmethod
+    def load(cls, user_id: str, path: Optional[str] = None) -> "JobIndex":
+        """The stored index, or an empty one if it is missing, unreadable or from another version."""
+        idx = cls(user_id, path)
+        try:
+            with open(idx.path) as f:
+                data = json.load(f)
+        except Exception:
+            return idx
+        if data.get("version") != INDEX_VERSION or data.get("user_id") != user_id:
+            return idx
+        idx.docs = data.get("docs") or {}
+        idx.postings = {t: set(hs) for t, hs in (data.get("postings") or {}).items()}
+        idx.by_date = [list(e) for e in data.get("by_date") or []]
+        idx.undated = {h for h, (date, _) in idx.docs.items() if not date}
+        idx.synced = data.get("synced")
+        return idx
+
+    def add(self, url_hash: str, title: str, posted_at=None):
+        """Index (or re-index) one job."""
+        if url_hash in self.docs:
+            self.remove(url_hash)
+        date = _posted_date(posted_at)
+        tokens = sorted(tokenize(title))
+        self.docs[url_hash] = [date, tokens]
+        for t in tokens:
+            self.postings.setdefault(t, set()).add(url_hash)
+        if date:
+            insort(self.by_date, [date, url_hash])
+        else:
+            self.undated.add(url_hash)
+
+    def remove(self, url_hash: str):
+        doc = self.docs.pop(url_hash, None)
+        if doc is None:
+            return
+        date, tokens = doc
+        for t in tokens:
+            hs = self.postings.get(t)
+            if hs is not None:
+                hs.discard(url_hash)
+                if not hs:
+                    del self.postings[t]
+        if date:
+            i = bisect_left(self.by_date, [date, url_hash])
+            if i < len(self.by_date) and self.by_date[i] == [date, url_hash]:
+                del self.by_date[i]
+        else:
+            self.undated.discard(url_hash)
+
+    def candidates(self, title_tokens: Iterable[str], since: Optional[str] = None,
+                   include_undated: bool = True) -> Set[str]:
+        """
+        url_hashes whose title shares a token with `title_tokens` (every job when
+        that is empty) and, with `since` (YYYY-MM-DD), posted on/after it; undated
+        jobs pass the date filter only with include_undated.
+        """
+        title_tokens = set(title_tokens or ())
+        by_title: Optional[Set[str]] = None
+        if title_tokens:
+            by_title = set()
+            for t in title_tokens:
+                by_title |= self.postings.get(t, set())
+        if since is None:
+            return by_title if by_title is not None else set(self.docs)
+
+        recent = {h for _, h in self.by_date[bisect_left(self.by_date, [since]):]}
+        if include_undated:
+            recent |= self.undated
+        return recent if by_title is None else (by_title & recent)
+
+    def save(self):
+        """Atomic write (compact JSON; posting lists sorted so diffs stay stable)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "user_id": self.user_id,
+                "updated_at": datetime.utcnow().isoformat() + "Z",
+                "synced": self.synced,
+                "docs": self.docs,
+                "postings": {t: sorted(hs) for t, hs in self.postings.items()},
+                "by_date": self.by_date,
+            }, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
@@ -0,0 +1,202 @@
+# src/core/postgrest.py
+"""
+Shared Supabase client: PostgREST tables plus Storage reads/writes over one
+keep-alive session, so a run pays for one TLS handshake instead of one per call.
+
+  get/get_one/head_count/patch  single requests; 429, 5xx and network errors are
+                                retried with backoff, other 4xx fail fast
+  upsert                        bulk rows through src.core.bulkwrite (gzip, chunks)
+  buffer                        PatchBuffer: coalesces many small updates (e.g.
+                                per-board status) into a few PATCHes per flush;
+                                update-only, so unknown keys never insert rows
+
+The base URL is injectable (PostgREST(base_url=...), or POSTGREST_URL), so a
+local stand-in server can take Supabase's place in tests and dev runs.
+
+Env:
+  SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+  POSTGREST_URL       overrides SUPABASE_URL (e.g. http://127.0.0.1:3000)
+  POSTGREST_RETRIES   default 3
+"""
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, Optional, Sequence
+from urllib.parse import quote
+
+import requests
+
+from src.core.bulkwrite import BulkWriter, pooled_session
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class PostgREST:
+    def __init__(self, base_url: Optional[str] = None, key: Optional[str] = None,
+                 session: Optional[requests.Session] = None, retries: Optional[int] = None,
+                 timeout: float = 30):
+        self.base_url = (base_url or os.getenv("POSTGREST_URL") or os.getenv("SUPABASE_URL") or "").rstrip("/")
+        self.key = key if key is not None else os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+        self.session = session or pooled_session(8)
+        self.retries = max(0, retries if retries is not None else int(os.getenv("POSTGREST_RETRIES", "3")))
+        self.timeout = timeout
+        self._writers: Dict[str, BulkWriter] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.base_url and self.key)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"apikey": self.key, "Authorization": f"Bearer {self.key}"}
+
+    def url(self, path: str) -> str:
+        """'jobs?select=...' -> <base>/rest/v1/jobs?select=..."""
+        return f"{self.base_url}/rest/v1/{path.lstrip('/')}"
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                timeout: Optional[float] = None, **kw) -> requests.Response:
+        """One call with retries; raises requests.HTTPError on a final error status."""
+        h = {**self.headers, **(headers or {})}
+        attempt = 0
+        while True:
+            r = None
+            try:
+                r = self.session.request(method, url, headers=h, timeout=timeout or self.timeout, **kw)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+            else:
+                if r.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    r.raise_for_status()
+                    return r
+            wait = None
+            if r is not None:
+                try:
+                    wait = float(r.headers.get("Retry-After"))
+                except (TypeError, ValueError):
+                    wait = None
+            time.sleep(wait if wait is not None else min(20.0, 0.75 * 2 ** attempt) * (0.5 + random.random()))
+            attempt += 1
+
+    # ---------- tables ----------
+    def get(self, path: str, timeout: Optional[float] = None) -> list:
+        """Rows for 'table?filters&select=...'."""
+        return self.request("GET", self.url(path), timeout=timeout).json() or []
+
+    def get_one(self, path: str) -> dict:
+        rows = self.get(path)
+        return (rows[0] if rows else {}) or {}
+
+    def head_count(self, path: str) -> Optional[int]:
+        """Exact row count for 'table?filters' via HEAD + Content-Range; None if the server can't say."""
+        r = self.request("HEAD", self.url(path), headers={"Prefer": "count=exact", "Range": "0-0"})
+        try:
+            return int(r.headers.get("Content-Range", "").rsplit("/", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    def patch(self, path: str, body: dict, timeout: Optional[float] = None):
+        self.request("PATCH", self.url(path), timeout=timeout, data=json.dumps(body),
+                     headers={"Content-Type": "application/json", "Prefer": "return=minimal"})
+
+    def upsert(self, table: str, rows: Iterable[Dict], on_conflict: str):
+        """Bulk upsert (merge-duplicates) through a per-target BulkWriter sharing this session; returns its chunk stats."""
+        return self.writer(table, on_conflict).write(rows)
+
+    def writer(self, table: str, on_conflict: str) -> BulkWriter:
+        key = f"{table}?on_conflict={on_conflict}"
+        with self._lock:
+            w = self._writers.get(key)
+            if w is None:
+                w = self._writers[key] = BulkWriter(
+                    self.url(key),
+                    {**self.headers, "Prefer": "resolution=merge-duplicates,return=minimal"},
+                    session=self.session,
+                )
+            return w
+
+    def buffer(self, table: str, key: str) -> "PatchBuffer":
+        return PatchBuffer(self, table, key)
+
+    # ---------- storage ----------
+    def download(self, bucket: str, path: str, timeout: float = 60) -> bytes:
+        url = f"{self.base_url}/storage/v1/object/{bucket}/{path.lstrip('/')}"
+        return self.request("GET", url, headers={"apikey": None}, timeout=timeout).content
+
+    def upload(self, bucket: str, path: str, data: bytes, content_type: str = "application/json",
+               timeout: float = 60):
+        """Create or overwrite one Storage object (x-upsert)."""
+        url = f"{self.base_url}/storage/v1/object/{bucket}/{path.lstrip('/')}"
+        self.request("POST", url, data=data, timeout=timeout,
+                     headers={"Content-Type": content_type, "x-upsert": "true"})
+
+def _in_item(v) -> str:
+    """One value of an in.(...) list: double-quoted so commas, dots and parens are literal."""
+    return quote('"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"', safe="")
+
+class PatchBuffer:
+    """
+    Update-only buffer for many small writes to existing rows. put() keeps the
+    latest body per row key (values of the key columns, exactly as stored);
+    flush() sends one PATCH per group of rows sharing a body and every key
+    column but the last, matched with in.(...) on the last. A key that matches
+    no row changes nothing: unlike an upsert, nothing is inserted and no
+    unique constraint is needed.
+    """
+    IN_CHUNK = 100   # keep the in.(...) filter well under URL length limits
+
+    def __init__(self, client: PostgREST, table: str, key: str):
+        self.client = client
+        self.table = table
+        self.key_cols: Sequence[str] = [c.strip() for c in key.split(",")]
+        self._rows: Dict[tuple, Dict] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def put(self, key: tuple, body: Dict):
+        with self._lock:
+            self._rows[tuple(key)] = body
+
+    def flush(self, common: Optional[Dict] = None) -> int:
+        """
+        PATCH the buffered rows (`common` is merged into every body); rows not
+        sent are re-buffered if a PATCH fails. Returns how many keys went out.
+        """
+        with self._lock:
+            rows, self._rows = self._rows, {}
+        groups: Dict[tuple, list] = {}
+        for key, body in rows.items():
+            groups.setdefault((key[:-1], json.dumps(body, sort_keys=True)), []).append(key)
+        sent = 0
+        try:
+            for (head, body), keys in groups.items():
+                filters = [f"{c}=eq.{quote(str(v), safe='')}" for c, v in zip(self.key_cols, head)]
+                for i in range(0, len(keys), self.IN_CHUNK):
+                    chunk = keys[i:i + self.IN_CHUNK]
+                    last = f"{self.key_cols[-1]}=in.({','.join(_in_item(k[-1]) for k in chunk)})"
+                    self.client.patch(f"{self.table}?{'&'.join(filters + [last])}", {**json.loads(body), **(common or {})})
+                    for k in chunk:
+                        del rows[k]
+                    sent += len(chunk)
+        except Exception:
+            with self._lock:
+                for key, body in rows.items():
+                    self._rows.setdefault(key, body)
+            raise
+        return sent
+
+_client: Optional[PostgREST] = None
+_client_lock = threading.Lock()
+
+def client() -> PostgREST:
+    """Process-wide client (one pooled session per run)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PostgREST()
+        return _client
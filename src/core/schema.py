@@ -1,17 +1,80 @@
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any
+# src/core/schema.py
+"""
+Job: the record every provider yields and crawl filters/scores directly.
+
+Slotted (no per-instance __dict__), with a dict-style read API (get / [])
+so code written against DB rows and crawled jobs alike keeps working;
+to_dict() is only for serialization boundaries.
+
+The description can be lazy: pass `describe` (a no-arg callable) instead of
+the text and it runs on first access, so postings the title gate drops never
+pay for HTML-to-text conversion.
+"""
+from typing import Any, Callable, Dict, Optional
 
-@dataclass
 class Job:
-    title: str
-    company: str
-    location: str
-    url: str
-    description: str
-    source: str
-    remote: Optional[bool] = None
-    created_at: Optional[str] = None
-    extras: Optional[Dict[str, Any]] = None
-
-    def to_dict(self):
-        return asdict(self)
+    FIELDS = ("title", "company", "location", "url", "description", "source",
+              "remote", "created_at", "extras", "posted_at", "detail_skipped")
+    __slots__ = ("title", "company", "location", "url", "source", "remote", "created_at",
+                 "extras", "posted_at", "detail_skipped", "_description", "_describe")
+
+    def __init__(self, title: str, company: str, location: str, url: str, description: str = "",
+                 source: str = "", remote: Optional[bool] = None, created_at: Optional[str] = None,
+                 extras: Optional[Dict[str, Any]] = None, posted_at: Optional[str] = None,
+                 detail_skipped: bool = False, describe: Optional[Callable[[], str]] = None):
+        self.title = title
+        self.company = company
+        self.location = location
+        self.url = url
+        self.source = source
+        self.remote = remote
+        self.created_at = created_at
+        self.extras = extras
+        self.posted_at = posted_at
+        self.detail_skipped = detail_skipped
+        self._description = description
+        self._describe = describe
+
+    @property
+    def description(self) -> str:
+        if self._describe is not None:
+            describe, self._describe = self._describe, None
+            try:
+                self._description = describe() or ""
+            except Exception:
+                self._description = ""
+        return self._description
+
+    @description.setter
+    def description(self, text: str):
+        self._description, self._describe = text, None
+
+    def get(self, key: str, default=None):
+        if key in self.FIELDS:
+            v = getattr(self, key)
+            return default if v is None else v
+        return default
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS and getattr(self, key) is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict in the old asdict() shape; posted_at/detail_skipped only when set."""
+        d = {
+            "title": self.title, "company": self.company, "location": self.location, "url": self.url,
+            "description": self.description, "source": self.source, "remote": self.remote,
+            "created_at": self.created_at, "extras": self.extras,
+        }
+        if self.posted_at:
+            d["posted_at"] = self.posted_at
+        if self.detail_skipped:
+            d["detail_skipped"] = True
+        return d
+
+    def __repr__(self) -> str:
+        return f"Job({self.source}:{self.company} {self.title!r} {self.url})"
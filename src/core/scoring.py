@@ -1,6 +1,17 @@
 # src/core/scoring.py
+import os
 import re
-from typing import Dict, Set, List, Iterable, Any
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from typing import Dict, Set, List, Iterable, Any, Tuple, FrozenSet, Optional, Pattern, Union
+
+try:
+    import numpy as np  # optional: vectorized batch scoring (pure-Python fallback below)
+except Exception:
+    np = None
 
 # -------- Location helpers (unchanged in spirit) --------
 
@@ -25,6 +36,9 @@ US_STATES = {
     "wisconsin","wyoming", "district of columbia", "dc"
 }
 
+# fallback location boost when the profile's own locations don't match
+EAST_COAST_HINTS = {"virginia","va","east coast","eastern time","et","est"}
+
 # -------- Text normalization --------
 
 _CANON_MAP = {
@@ -38,7 +52,7 @@ def _canon(tok: str) -> str:
     t = (tok or "").lower()
     return _CANON_MAP.get(t, t)
 
-def tokenize(text: str) -> Set[str]:
+def _tokenize(text: str) -> Set[str]:
     """
     Tokenize to a set of lowercase terms and expand common variants:
     - keep hyphenated variant, split pieces, and de-hyphenated form
@@ -71,6 +85,85 @@ def tokenize(text: str) -> Set[str]:
 
     return {x for x in final if x}
 
+class TokenCache:
+    """
+    Bounded LRU of tokenize() results, keyed by a blake2b digest of the text so
+    multi-KB descriptions aren't kept alive as keys. Tokens are interned to
+    integer ids and each entry is a sorted array('I') of ids, so a job's
+    description costs a few bytes per distinct token however often it is
+    scored (crawl filter, rank gate, batch scorer, every user in a batch).
+    Evicted entries leave their words interned, so once the vocabulary has
+    doubled since the last pass it is rebuilt from the live entries alone.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, array]" = OrderedDict()
+        self._ids: Dict[str, int] = {}
+        self._words: List[str] = []
+        self._compact_at = max(1, max_size)
+        self._lock = threading.Lock()
+
+    def _intern(self, tokens: Iterable[str]) -> array:
+        ids = []
+        for t in tokens:
+            i = self._ids.get(t)
+            if i is None:
+                i = self._ids[t] = len(self._words)
+                self._words.append(t)
+            ids.append(i)
+        ids.sort()
+        return array("I", ids)
+
+    def _compact(self):
+        """Drop words no live entry uses; ids keep their relative order, so entries stay sorted."""
+        live = sorted({i for ids in self._entries.values() for i in ids})
+        remap = {old: new for new, old in enumerate(live)}
+        self._words = [self._words[i] for i in live]
+        self._ids = {w: i for i, w in enumerate(self._words)}
+        for key, ids in list(self._entries.items()):
+            self._entries[key] = array("I", [remap[i] for i in ids])
+        self._compact_at = max(self.max_size, 2 * len(self._words))
+
+    def tokenize(self, text: str) -> Set[str]:
+        key = blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            ids = self._entries.get(key)
+            if ids is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                words = self._words
+                return {words[i] for i in ids}
+        tokens = _tokenize(text)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = self._intern(tokens)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            if len(self._words) > self._compact_at:
+                self._compact()
+        return tokens
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                    "max_size": self.max_size, "vocab": len(self._words)}
+
+# TOKEN_CACHE_SIZE=0 turns memoization off
+_token_cache = TokenCache(int(os.getenv("TOKEN_CACHE_SIZE", "8192") or 0))
+
+def tokenize(text: str) -> Set[str]:
+    """_tokenize, memoized. Always returns a fresh set the caller may mutate."""
+    text = text or ""
+    if _token_cache.max_size <= 0:
+        return _tokenize(text)
+    return _token_cache.tokenize(text)
+
+def token_cache_stats() -> Dict[str, int]:
+    """hits / misses / size / max_size / vocab (distinct interned tokens) of the tokenize cache."""
+    return _token_cache.stats()
+
 def _as_list(v: Any) -> List[Any]:
     if v is None:
         return []
@@ -111,59 +204,453 @@ def mentions_state(text: str, wanted: Iterable[str]) -> bool:
             return True
     return False
 
-def location_ok(job: Dict, policy: Dict) -> bool:
-    policy = policy or {}
-    loc = (job.get("location") or "")
-    desc = (job.get("description") or "")
-    combined = f"{loc} {desc}"
+def any_substring_re(needles: Iterable[str]) -> Optional[Pattern]:
+    """One regex equivalent to `any(n in text for n in needles)`; None when there are no needles."""
+    ns = sorted(set(needles), key=len, reverse=True)
+    return re.compile("|".join(re.escape(n) for n in ns)) if ns else None
+
+# -------- Location classifier --------
 
-    if bool(policy.get("remote_only")) and not is_remote(loc, desc):
-        return False
+# where a needle may match: anywhere in "loc desc", or wholly inside one field
+ANY, LOC, LOC_OR_DESC = "any", "loc", "loc_or_desc"
 
-    allowed_countries = set(_lower_list(policy.get("allowed_countries")))
-    if allowed_countries:
-        if not any(c in combined.lower() for c in allowed_countries):
-            if not (is_remote(loc, desc) and mentions_us(combined)):
+@dataclass(frozen=True)
+class LocationSignals:
+    """
+    Everything the location gate and the soft boost need, from one scan of
+    loc + desc. Categories the policy never consults are not scanned for
+    (remote/us stay False under a policy with no remote_only or countries).
+    """
+    remote: bool = False
+    us: bool = False
+    countries: FrozenSet[str] = frozenset()
+    states: FrozenSet[str] = frozenset()
+    east_coast: bool = False
+
+def _trie_regex(words: Iterable[Tuple[str, bool]]) -> str:
+    """
+    Alternation over (word, bounded) literals, factored into a trie
+    ("re(?:mote(?:ly)?)"). The engine then branches on one character per
+    position instead of trying every word, and the greedy optionals make the
+    longest word win. Bounded words must end on a word boundary.
+    """
+    trie: Dict[str, Any] = {}
+    for w, bounded in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = node.get("", True) and bounded
+
+    def build(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node and node[""]:
+            alts.append(r"\b")
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node and not node[""] else body
+
+    return build(trie)
+
+class LocationMatcher:
+    """
+    Finds which needles occur in "loc desc" in one left-to-right scan.
+
+    Each hit also credits the shorter needles that are prefixes of it at the
+    same offset, so overlapping needles are not missed. Once a category is
+    settled (any hit; every needle for `collect` categories) its needles drop
+    out of the pattern, so common words like "us" cost one hit, not hundreds.
+    Bounded needles (2-letter state codes) are verified with their own \\b regex.
+    """
+    def __init__(self, specs: Iterable[Tuple[str, str, Iterable[str], bool]], collect: Iterable[str] = ()):
+        # literal -> ((category, region, bounded), ...)
+        entries: Dict[str, List[Tuple[str, str, bool]]] = {}
+        self._always: Dict[str, Set[str]] = {}
+        for category, region, needles, bounded in specs:
+            for n in needles:
+                if n == "":
+                    self._always.setdefault(category, set()).add(n)
+                else:
+                    entries.setdefault(n, []).append((category, region, bounded))
+        self._entries = {n: tuple(e) for n, e in entries.items()}
+        self._collect = frozenset(collect)
+        self._prefixes = {n: [m for m in entries if m != n and n.startswith(m)] for n in entries}
+        self._bounded = {n: re.compile(rf"\b{re.escape(n)}\b")
+                         for n, ents in entries.items() if any(e[2] for e in ents)}
+        self._patterns: Dict[Tuple[FrozenSet[str], FrozenSet[Tuple[str, str]], bool], Tuple[Optional[Pattern], bool]] = {}
+
+    def _live(self, category: str, region: str, n: str, done, got, in_loc: bool) -> bool:
+        return (category not in done and (category, n) not in got
+                and (in_loc or region != LOC))
+
+    def _pattern(self, done: Set[str], got: Set[Tuple[str, str]], in_loc: bool) -> Tuple[Optional[Pattern], bool]:
+        """
+        (trie over the needles still wanted, whether they are all loc-only).
+        Cached: the same few settled/collected states recur from job to job.
+        """
+        key = (frozenset(done), frozenset(got), in_loc)
+        hit = self._patterns.get(key)
+        if hit is None:
+            words = []
+            loc_only = True
+            for n, ents in self._entries.items():
+                live = [e for e in ents if self._live(e[0], e[1], n, done, got, in_loc)]
+                if live:
+                    words.append((n, all(e[2] for e in live)))
+                    loc_only = loc_only and all(e[1] == LOC for e in live)
+            if len(self._patterns) >= 256:
+                self._patterns.clear()
+            hit = self._patterns[key] = (re.compile(_trie_regex(words)) if words else None, loc_only)
+        return hit
+
+    def scan(self, loc: str, desc: str) -> Dict[str, Set[str]]:
+        """category -> needles found."""
+        found = {c: set(v) for c, v in self._always.items()}
+        done = {c for c in found if c not in self._collect}     # settled categories
+        got: Set[Tuple[str, str]] = set()                       # (collect category, needle) already found
+        l = (loc or "").lower()
+        split = len(l)
+        in_loc = True
+        pat, loc_only = self._pattern(done, got, in_loc)
+        # nothing wanted past the location field: skip lowering the description
+        text = l if loc_only else f"{l} {(desc or '').lower()}"
+        pos = 0
+        while pat is not None:
+            m = pat.search(text, pos, split if loc_only else len(text))
+            if m is None:
+                break
+            start = m.start()
+            if in_loc and start > split:
+                # past the location field: loc-only needles can no longer match
+                in_loc = False
+                pat, loc_only = self._pattern(done, got, in_loc)
+                continue
+
+            settled = False
+            for n in (m.group(), *self._prefixes[m.group()]):
+                end = start + len(n)
+                for category, region, bounded in self._entries.get(n, ()):
+                    if not self._live(category, region, n, done, got, in_loc):
+                        continue
+                    if region == LOC and end > split:
+                        continue
+                    if region == LOC_OR_DESC and not (end <= split or start > split):
+                        continue
+                    if bounded and not self._bounded[n].match(text, start):
+                        continue
+                    found.setdefault(category, set()).add(n)
+                    settled = True
+                    if category in self._collect:
+                        got.add((category, n))
+                    else:
+                        done.add(category)
+            if settled:
+                pat, loc_only = self._pattern(done, got, in_loc)
+            pos = start + 1
+        return found
+
+@dataclass(frozen=True)
+class LocationPolicy:
+    """location_policy with the allowed countries/states lowered and one matcher compiled for all of them."""
+    remote_only: bool = False
+    countries: FrozenSet[str] = frozenset()
+    states: FrozenSet[str] = frozenset()
+    matcher: Optional[LocationMatcher] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def compile(cls, policy: Optional[Dict]) -> "LocationPolicy":
+        policy = policy or {}
+        countries = frozenset(_lower_list(policy.get("allowed_countries")))
+        states = frozenset(_lower_list(policy.get("allowed_states")))
+        remote_only = bool(policy.get("remote_only"))
+        # only scan for what this policy's gate consults (plus the loc-only boost hint)
+        matcher = LocationMatcher([
+            ("remote", LOC_OR_DESC, REMOTE_KEYWORDS if (remote_only or countries) else (), False),
+            ("us", ANY, US_KEYWORDS if countries else (), False),
+            ("east_coast", LOC, EAST_COAST_HINTS, False),
+            ("countries", ANY, countries, False),
+            # 2-letter codes must stand alone ("va" not in "nevada"); names match anywhere
+            ("states", ANY, [s for s in states if len(s) == 2], True),
+            ("states", ANY, [s for s in states if s and len(s) != 2], False),
+        ], collect=("countries", "states"))
+        return cls(
+            remote_only=remote_only,
+            countries=countries,
+            states=states,
+            matcher=matcher,
+        )
+
+    def classify(self, loc: str, desc: str) -> LocationSignals:
+        found = self.matcher.scan(loc, desc)
+        return LocationSignals(
+            remote=bool(found.get("remote")),
+            us=bool(found.get("us")),
+            countries=frozenset(found.get("countries", ())),
+            states=frozenset(found.get("states", ())),
+            east_coast=bool(found.get("east_coast")),
+        )
+
+    def allows(self, sig: LocationSignals) -> bool:
+        if self.remote_only and not sig.remote:
+            return False
+
+        if self.countries and not sig.countries:
+            if not (sig.remote and sig.us):
                 return False
 
-    allowed_states = set(_lower_list(policy.get("allowed_states")))
-    if allowed_states and not mentions_state(combined, allowed_states):
-        return False
+        if self.states and not sig.states:
+            return False
+
+        return True
+
+    def ok(self, loc: str, desc: str) -> bool:
+        return self.allows(self.classify(loc, desc))
+
+def location_ok(job: Dict, policy: Union[Dict, LocationPolicy], signals: Optional[LocationSignals] = None) -> bool:
+    """Policy gate; pass `signals` when the caller already classified this job."""
+    if not isinstance(policy, LocationPolicy):
+        policy = LocationPolicy.compile(policy)
+    if signals is None:
+        signals = policy.classify(job.get("location") or "", job.get("description") or "")
+    return policy.allows(signals)
+
+# -------- Compiled profile --------
 
-    return True
+# lightweight title synonyms so the crawl gate doesn't miss obvious variants
+TITLE_SYNONYMS = {"editor": "editorial", "editorial": "editor"}
+
+@dataclass(frozen=True)
+class CompiledProfile:
+    """
+    A profile with every derived token set and matcher built once per user.
+    compile_profile() it at the top of crawl/rank and hand it to score_job,
+    score_jobs and location_ok instead of the raw dict.
+    """
+    raw: Dict = field(repr=False, compare=False)
+    skills: FrozenSet[str]
+    titles: FrozenSet[str]
+    locations: FrozenSet[str]
+    musts: FrozenSet[str]
+    gate_titles: FrozenSet[str]          # titles + TITLE_SYNONYMS (crawl title gate)
+    include: FrozenSet[str]              # gate_titles | skills
+    include_re: Optional[Pattern]        # substring match for any include token
+    location_policy: LocationPolicy
+    recency_days: int = 0
+    require_posted_date: bool = False
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.raw.get(key, default)
+
+def compile_profile(profile: Union[Dict, CompiledProfile, None]) -> CompiledProfile:
+    """Build a CompiledProfile from a profile row; already-compiled profiles pass through."""
+    if isinstance(profile, CompiledProfile):
+        return profile
+    profile = profile or {}
+    titles = frozenset(tokens_from_terms(profile.get("target_titles")))
+    skills = frozenset(tokens_from_terms(profile.get("skills")))
+    gate_titles = titles | {TITLE_SYNONYMS[t] for t in titles if t in TITLE_SYNONYMS}
+    include = gate_titles | skills
+    search = profile.get("search_policy") or {}
+    return CompiledProfile(
+        raw=profile,
+        skills=skills,
+        titles=titles,
+        locations=frozenset(tokens_from_terms(profile.get("locations"))),
+        musts=frozenset(tokens_from_terms(profile.get("must_haves"))),
+        gate_titles=gate_titles,
+        include=include,
+        include_re=any_substring_re(include),
+        location_policy=LocationPolicy.compile(profile.get("location_policy")),
+        recency_days=int(search.get("recency_days", 0) or 0),
+        require_posted_date=bool(search.get("require_posted_date", False)),
+    )
 
 # -------- Scoring --------
 
-def score_job(job: Dict, profile: Dict) -> float:
-    # Location gate
-    if not location_ok(job, profile.get("location_policy") or {}):
-        return 0.0
+def score_job(job: Dict, profile: Union[Dict, CompiledProfile]) -> float:
+    cp = compile_profile(profile)
 
     title = (job.get("title") or "")
     desc  = (job.get("description") or "")
     loc   = (job.get("location") or "")
 
-    job_tokens = tokenize(title) | tokenize(desc)
+    # Location gate (one scan feeds both the gate and the east-coast boost below)
+    signals = cp.location_policy.classify(loc, desc)
+    if not cp.location_policy.allows(signals):
+        return 0.0
+
+    title_tokens = tokenize(title)
+    job_tokens = title_tokens | tokenize(desc)
 
     # Must-have terms (as tokens)
-    must_tokens = tokens_from_terms(profile.get("must_haves"))
-    if must_tokens and not must_tokens.issubset(job_tokens):
+    if cp.musts and not cp.musts.issubset(job_tokens):
         return 0.0
 
     # Skill overlap on normalized tokens
-    skill_tokens = tokens_from_terms(profile.get("skills"))
-    skill_overlap = len(skill_tokens & job_tokens) / max(1, len(skill_tokens))
+    skill_overlap = len(cp.skills & job_tokens) / max(1, len(cp.skills))
 
     # Title similarity: compare token sets (handles phrases like "front end")
-    target_title_tokens = tokens_from_terms(profile.get("target_titles"))
-    title_similarity = len(target_title_tokens & tokenize(title)) / max(1, len(target_title_tokens))
+    title_similarity = len(cp.titles & title_tokens) / max(1, len(cp.titles))
 
     # Soft location boost: prefer matches to user-provided locations; fallback heuristic
     loc_boost = 0.0
-    loc_terms = tokens_from_terms(profile.get("locations"))
-    if loc_terms and (loc_terms & tokenize(f"{loc} {desc}")):
+    if cp.locations and (cp.locations & tokenize(f"{loc} {desc}")):
         loc_boost = 0.1
-    elif contains_any(loc, {"virginia","va","east coast","eastern time","et","est"}):
+    elif signals.east_coast:
         loc_boost = 0.1
 
     return round(0.6 * skill_overlap + 0.3 * title_similarity + loc_boost, 4)
+
+# -------- Batch scoring --------
+
+def _presence(token_sets: List[Set[str]], vocab: Dict[str, int]):
+    """jobs x vocab boolean matrix, filled from sparse (row, col) hits."""
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, toks in enumerate(token_sets):
+        for t in toks:
+            c = vocab.get(t)
+            if c is not None:
+                rows.append(i); cols.append(c)
+    m = np.zeros((len(token_sets), max(1, len(vocab))), dtype=bool)
+    m[rows, cols] = True
+    return m
+
+def _term_counts(title_toks, desc_toks, loc_toks, skills, titles, locs, musts):
+    """
+    Per job: (skill hits, title hits, any location hit, all must-haves present).
+    Only profile terms matter, so jobs are encoded over that small vocabulary.
+    """
+    n = len(title_toks)
+    if np is None or n == 0:
+        out = []
+        for tt, dt, lt in zip(title_toks, desc_toks, loc_toks):
+            jt = tt | dt
+            out.append((len(skills & jt), len(titles & tt), bool(locs & (lt | dt)), musts.issubset(jt)))
+        return out
+
+    vocab = {t: i for i, t in enumerate(sorted(skills | titles | locs | musts))}
+    T = _presence(title_toks, vocab)
+    D = _presence(desc_toks, vocab)
+    L = _presence(loc_toks, vocab)
+    J = T | D
+
+    def idx(terms):
+        return np.fromiter((vocab[t] for t in terms), dtype=np.intp, count=len(terms))
+
+    skill_hits = J[:, idx(skills)].sum(axis=1)
+    title_hits = T[:, idx(titles)].sum(axis=1)
+    loc_hit = (L | D)[:, idx(locs)].any(axis=1)
+    must_ok = J[:, idx(musts)].all(axis=1)
+    return list(zip(skill_hits.tolist(), title_hits.tolist(), loc_hit.tolist(), must_ok.tolist()))
+
+def _combine(cp: CompiledProfile, n_skill: int, n_title: int, loc_hit: bool, must_ok: bool,
+             signals: LocationSignals) -> Tuple[float, float, float, float]:
+    """Overlap counts + location signals -> (skill_overlap, title_similarity, loc_boost, score), as score_job weighs them."""
+    skill_overlap = n_skill / max(1, len(cp.skills))
+    title_similarity = n_title / max(1, len(cp.titles))
+    loc_boost = 0.0
+    if cp.locations and loc_hit:
+        loc_boost = 0.1
+    elif signals.east_coast:
+        loc_boost = 0.1
+
+    if not cp.location_policy.allows(signals) or (cp.musts and not must_ok):
+        score = 0.0
+    else:
+        score = round(0.6 * skill_overlap + 0.3 * title_similarity + loc_boost, 4)
+    return skill_overlap, title_similarity, loc_boost, score
+
+def _job_tokens(jobs: List[Dict]) -> Tuple[List[Set[str]], List[Set[str]], List[Set[str]]]:
+    title_toks, desc_toks, loc_toks = [], [], []
+    for j in jobs:
+        title_toks.append(tokenize(j.get("title") or ""))
+        desc_toks.append(tokenize(j.get("description") or ""))
+        loc_toks.append(tokenize(j.get("location") or ""))
+    return title_toks, desc_toks, loc_toks
+
+def score_jobs(jobs: List[Dict], profile: Union[Dict, CompiledProfile], with_parts: bool = False) -> List[Any]:
+    """
+    Batch score_job: the profile is tokenized once and the set overlaps run as
+    array ops over a jobs x profile-terms matrix. Returns the same scores as
+    score_job, in input order. with_parts=True returns
+    (skill_overlap, title_similarity, loc_boost, score) tuples instead, with the
+    parts rounded to 4 places and computed even when a gate zeroes the score.
+    """
+    cp = compile_profile(profile)
+    title_toks, desc_toks, loc_toks = _job_tokens(jobs)
+    counts = _term_counts(title_toks, desc_toks, loc_toks, cp.skills, cp.titles, cp.locations, cp.musts)
+
+    out = []
+    for j, (n_skill, n_title, loc_hit, must_ok) in zip(jobs, counts):
+        signals = cp.location_policy.classify(j.get("location") or "", j.get("description") or "")
+        skill_overlap, title_similarity, loc_boost, score = _combine(cp, n_skill, n_title, loc_hit, must_ok, signals)
+        if with_parts:
+            out.append((round(skill_overlap, 4), round(title_similarity, 4), round(loc_boost, 4), score))
+        else:
+            out.append(score)
+    return out
+
+def score_matrix(jobs: List[Dict], profiles: List[CompiledProfile],
+                 mask: Optional[List[Iterable[int]]] = None) -> List[Dict[int, Tuple[float, float, float, float]]]:
+    """
+    Score every job against several compiled profiles in one pass: jobs are
+    tokenized once, the overlap counts for all profiles come from one
+    jobs x vocab by vocab x profiles matrix product, and location signals are
+    computed once per distinct location policy.
+
+    mask[i] lists the profile indexes wanted for job i (default: all). Returns,
+    per job, {profile index: (skill_overlap, title_similarity, loc_boost, score)}
+    with the same rounding as score_jobs(..., with_parts=True).
+    """
+    n, n_prof = len(jobs), len(profiles)
+    wanted = [range(n_prof)] * n if mask is None else [list(m) for m in mask]
+    title_toks, desc_toks, loc_toks = _job_tokens(jobs)
+
+    if np is None or n == 0 or n_prof == 0:
+        per_profile = {}
+        for p in {p for m in wanted for p in m}:
+            cp = profiles[p]
+            rows = [i for i in range(n) if p in wanted[i]]
+            counts = _term_counts([title_toks[i] for i in rows], [desc_toks[i] for i in rows],
+                                  [loc_toks[i] for i in rows], cp.skills, cp.titles, cp.locations, cp.musts)
+            per_profile[p] = dict(zip(rows, counts))
+        count_of = lambda i, p: per_profile[p][i]
+    else:
+        vocab: Dict[str, int] = {}
+        for cp in profiles:
+            for t in sorted(cp.skills | cp.titles | cp.locations | cp.musts):
+                vocab.setdefault(t, len(vocab))
+        T = _presence(title_toks, vocab)
+        D = _presence(desc_toks, vocab)
+        L = _presence(loc_toks, vocab)
+        J = (T | D).astype(np.int32)
+
+        def terms(attr):
+            m = np.zeros((max(1, len(vocab)), n_prof), dtype=np.int32)
+            for p, cp in enumerate(profiles):
+                for t in getattr(cp, attr):
+                    m[vocab[t], p] = 1
+            return m
+
+        Mu = terms("musts")
+        skill_hits = (J @ terms("skills")).tolist()
+        title_hits = (T.astype(np.int32) @ terms("titles")).tolist()
+        loc_hit = ((L | D).astype(np.int32) @ terms("locations") > 0).tolist()
+        must_ok = (J @ Mu == Mu.sum(axis=0)).tolist()
+        count_of = lambda i, p: (skill_hits[i][p], title_hits[i][p], loc_hit[i][p], must_ok[i][p])
+
+    out: List[Dict[int, Tuple[float, float, float, float]]] = []
+    for i, j in enumerate(jobs):
+        loc, desc = j.get("location") or "", j.get("description") or ""
+        signals: Dict[LocationPolicy, LocationSignals] = {}
+        row = {}
+        for p in wanted[i]:
+            cp = profiles[p]
+            sig = signals.get(cp.location_policy)
+            if sig is None:
+                sig = signals[cp.location_policy] = cp.location_policy.classify(loc, desc)
+            so, ts, lb, score = _combine(cp, *count_of(i, p), sig)
+            row[p] = (round(so, 4), round(ts, 4), round(lb, 4), score)
+        out.append(row)
+    return out
@@ -0,0 +1,212 @@
+# src/core/store.py
+"""
+Local job store: one SQLite file with typed columns and upserts, replacing the
+data/jobs.jsonl dump (rewritten whole every crawl) and data/scores.jsonl.
+
+  jobs:   (user_id, url_hash) -> posting columns, content_hash, closed_at
+          indexed on url_hash, company, source and posted_at
+  scores: (user_id, url_hash) -> score parts from the last rank
+
+crawl upserts each persisted batch and stamps closed postings; rank reads it
+when the DB is unreachable and records its scores; draft_email pulls full
+descriptions from it instead of re-fetching the posting.
+
+Env:
+  JOB_STORE=0       disable entirely
+  JOB_STORE_PATH    default data/jobs.sqlite3
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SCHEMA_VERSION = 1
+
+JOB_FIELDS = ("url_hash", "url", "title", "company", "location", "description",
+              "source", "source_slug", "posted_at", "closed_at", "content_hash", "meta")
+SCORE_FIELDS = ("skill_overlap", "title_similarity", "loc_boost", "score")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    user_id      TEXT NOT NULL,
+    url_hash     TEXT NOT NULL,
+    url          TEXT NOT NULL,
+    title        TEXT,
+    company      TEXT,
+    location     TEXT,
+    description  TEXT,
+    source       TEXT,
+    source_slug  TEXT,
+    posted_at    TEXT,
+    closed_at    TEXT,
+    content_hash TEXT,
+    meta         TEXT,
+    updated_at   TEXT NOT NULL,
+    PRIMARY KEY (user_id, url_hash)
+);
+CREATE INDEX IF NOT EXISTS jobs_url_hash  ON jobs (url_hash);
+CREATE INDEX IF NOT EXISTS jobs_company   ON jobs (company);
+CREATE INDEX IF NOT EXISTS jobs_source    ON jobs (source, source_slug);
+CREATE INDEX IF NOT EXISTS jobs_posted_at ON jobs (posted_at);
+
+CREATE TABLE IF NOT EXISTS scores (
+    user_id          TEXT NOT NULL,
+    url_hash         TEXT NOT NULL,
+    skill_overlap    REAL,
+    title_similarity REAL,
+    loc_boost        REAL,
+    score            REAL NOT NULL,
+    ranked_at        TEXT NOT NULL,
+    PRIMARY KEY (user_id, url_hash)
+);
+CREATE INDEX IF NOT EXISTS scores_rank ON scores (user_id, score DESC);
+"""
+
+def url_hash(url: str) -> str:
+    """Same key crawl stores jobs under (sha1 of the trimmed, lowercased URL)."""
+    return hashlib.sha1((url or "").strip().lower().encode("utf-8")).hexdigest()
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _env_flag(name: str, default: bool = True) -> bool:
+    return str(os.getenv(name, "1" if default else "0")).strip().lower() not in ("", "0", "false", "no")
+
+class JobStore:
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # one connection shared by crawl's persist threads; the lock serializes them
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._db.executescript(_SCHEMA)
+                self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ---------- jobs ----------
+    def upsert_jobs(self, user_id: str, jobs: Iterable[Dict]) -> int:
+        """
+        Insert or update jobs (crawl's dicts or DB rows) keyed on (user_id, url_hash).
+        A re-seen posting is open again unless the row itself says closed.
+        """
+        now = _now_iso()
+        rows = []
+        for j in jobs:
+            url = j.get("url") or ""
+            meta = j.get("meta", j.get("extras"))
+            rows.append((
+                user_id, j.get("url_hash") or url_hash(url), url,
+                j.get("title"), j.get("company"), j.get("location"), j.get("description"),
+                j.get("source"), j.get("source_slug"), j.get("posted_at"), j.get("closed_at"),
+                j.get("content_hash"), json.dumps(meta) if meta else None, now,
+            ))
+        if not rows:
+            return 0
+        cols = ("user_id",) + JOB_FIELDS + ("updated_at",)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in cols[2:])
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT INTO jobs ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+                f"ON CONFLICT (user_id, url_hash) DO UPDATE SET {updates}",
+                rows,
+            )
+        return len(rows)
+
+    def close_jobs(self, user_id: str, url_hashes: Sequence[str], closed_at: Optional[str] = None) -> int:
+        """Stamp closed_at on these postings (already-closed ones keep their stamp)."""
+        if not url_hashes:
+            return 0
+        closed_at = closed_at or _now_iso()
+        with self._lock, self._db:
+            cur = self._db.executemany(
+                "UPDATE jobs SET closed_at = ?, updated_at = ? "
+                "WHERE user_id = ? AND url_hash = ? AND closed_at IS NULL",
+                [(closed_at, closed_at, user_id, h) for h in url_hashes],
+            )
+        return cur.rowcount
+
+    def _select(self, sql: str, params: Sequence = ()) -> List[Dict]:
+        with self._lock:
+            return [self._row(r) for r in self._db.execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _row(r: sqlite3.Row) -> Dict:
+        d = dict(r)
+        if d.get("meta"):
+            try: d["meta"] = json.loads(d["meta"])
+            except Exception: pass
+        return d
+
+    def iter_jobs(self, user_id: str, open_only: bool = False, columns: Sequence[str] = JOB_FIELDS,
+                  page: int = 1000) -> Iterator[Dict]:
+        """The user's jobs in url_hash order, read in keyset pages so large stores stream."""
+        cols = ", ".join(c for c in columns if c in JOB_FIELDS)
+        where = "user_id = ? AND url_hash > ?" + (" AND closed_at IS NULL" if open_only else "")
+        after = ""
+        while True:
+            rows = self._select(f"SELECT url_hash AS _key, {cols} FROM jobs WHERE {where} "
+                                f"ORDER BY url_hash LIMIT ?", (user_id, after, page))
+            for r in rows:
+                after = r.pop("_key")
+                yield r
+            if len(rows) < page:
+                return
+
+    def find(self, url_hash: str) -> Optional[Dict]:
+        """The posting under this url_hash for any user (the one with the longest description)."""
+        rows = self._select(
+            f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE url_hash = ? "
+            f"ORDER BY length(coalesce(description, '')) DESC LIMIT 1", (url_hash,))
+        return rows[0] if rows else None
+
+    def count(self, user_id: str, open_only: bool = True) -> int:
+        sql = "SELECT count(*) FROM jobs WHERE user_id = ?" + (" AND closed_at IS NULL" if open_only else "")
+        with self._lock:
+            return self._db.execute(sql, (user_id,)).fetchone()[0]
+
+    # ---------- scores ----------
+    def put_scores(self, user_id: str, scored: Iterable[tuple], replace: bool = False) -> int:
+        """
+        Record (url_hash, parts) pairs, parts being score_jobs' (skill_overlap,
+        title_similarity, loc_boost, score) or None. replace=True drops the
+        user's earlier scores first (a full re-rank).
+        """
+        now = _now_iso()
+        rows = [(user_id, h, *(p if p is not None else (None, None, None, 0.0)), now)
+                for h, p in scored if h]
+        with self._lock, self._db:
+            if replace:
+                self._db.execute("DELETE FROM scores WHERE user_id = ?", (user_id,))
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO scores (user_id, url_hash, {', '.join(SCORE_FIELDS)}, ranked_at) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+def store_path() -> str:
+    return os.getenv("JOB_STORE_PATH") or os.path.join(ROOT, "data", "jobs.sqlite3")
+
+def job_store() -> Optional[JobStore]:
+    """Process-wide store, or None when JOB_STORE is off."""
+    global _store
+    if not _env_flag("JOB_STORE", True):
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = JobStore(store_path())
+        return _store
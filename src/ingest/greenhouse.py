@@ -1,8 +1,11 @@
-from bs4 import BeautifulSoup
-from .utils import get_text
+from bs4 import BeautifulSoup, SoupStrainer
+from .utils import get_text, aget_text, get_json, aget_json, INGEST_WORKERS
+from .htmlparse import parse, parse_body, json_ld, lxml_body, text_of, page_text
 from src.core.schema import Job
 
-import json
+import asyncio
+import html as htmllib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 def _parse_date_iso(s: str) -> str | None:
@@ -21,13 +24,9 @@ def _parse_date_iso(s: str) -> str | None:
     except Exception:
         return None
 
-def _extract_posted_from_jsonld(jsoup: BeautifulSoup) -> str | None:
+def _extract_posted_from_jsonld(job_html: str) -> str | None:
     # Look for JSON-LD blocks and pull "datePosted"
-    for tag in jsoup.find_all("script", type="application/ld+json"):
-        try:
-            data = json.loads(tag.get_text(strip=True))
-        except Exception:
-            continue
+    for data in json_ld(job_html):
         # Could be an array or an object
         items = data if isinstance(data, list) else [data]
         for it in items:
@@ -37,54 +36,116 @@ def _extract_posted_from_jsonld(jsoup: BeautifulSoup) -> str | None:
                     return iso
     return None
 
-def _extract_posted_from_dom(jsoup: BeautifulSoup) -> str | None:
-    # Common DOM hints for dates on GH pages
-    # <time datetime="2025-02-01"> ... or similar meta
-    time_el = jsoup.find("time")
-    if time_el and time_el.get("datetime"):
-        iso = _parse_date_iso(time_el.get("datetime"))
-        if iso:
-            return iso
-    # meta/itemprop
-    meta = jsoup.find(attrs={"itemprop": "datePosted"})
-    if meta:
-        if meta.get("content"):
-            iso = _parse_date_iso(meta.get("content"))
-            if iso:
-                return iso
-        text = meta.get_text(strip=True)
-        iso = _parse_date_iso(text)
+def _posted_from_hints(time_datetime: str | None, meta_content: str | None, meta_text: str | None) -> str | None:
+    # Common DOM hints for dates on GH pages: <time datetime="2025-02-01">,
+    # then itemprop="datePosted" (content attribute, else its text)
+    for hint in (time_datetime, meta_content, meta_text):
+        iso = _parse_date_iso(hint) if hint else None
         if iso:
             return iso
     return None
 
-def crawl_greenhouse(slug: str):
-    board_url = f"https://boards.greenhouse.io/{slug}"
-    html = get_text(board_url)
-    if not html:
-        return []
+def _extract_posted_from_dom(jsoup: BeautifulSoup) -> str | None:
+    time_el = jsoup.find("time")
+    meta = jsoup.find(attrs={"itemprop": "datePosted"})
+    return _posted_from_hints(time_el.get("datetime") if time_el else None,
+                              meta.get("content") if meta else None,
+                              meta.get_text(strip=True) if meta else None)
 
-    soup = BeautifulSoup(html, 'html.parser')
-    jobs = []
-    anchors = set()
+# lxml.html twins of the soup selectors below (first match in document order)
+_LOCATION_XP = 'descendant-or-self::*[contains(@class, "location")]'
+_MAIN_XP = 'descendant-or-self::*[%s or @id = "content"]' % ' or '.join(
+    f'contains(concat(" ", normalize-space(@class), " "), " {c} ")' for c in ('content', 'opening', 'job', 'application'))
+_DATE_POSTED_XP = 'descendant-or-self::*[@itemprop = "datePosted"]'
+
+def _job_page_lxml(body) -> tuple[str, str, str | None]:
+    page_location = next((t for t in (text_of(el, '') for el in body.xpath(_LOCATION_XP)) if t), '')
+    main = body.xpath(_MAIN_XP)
+    desc_text = ' '.join(text_of(main[0] if main else body).split())
+    time_el = next(body.iter('time'), None)
+    meta = body.xpath(_DATE_POSTED_XP)
+    posted_iso = _posted_from_hints(time_el.get('datetime') if time_el is not None else None,
+                                    meta[0].get('content') if meta else None,
+                                    text_of(meta[0], '') if meta else None)
+    return page_location, desc_text, posted_iso
+
+def _job_page_soup(job_html: str) -> tuple[str, str, str | None]:
+    jsoup = parse_body(job_html)
+
+    # Try common location spots on GH job page
+    page_location = ''
+    loc_spots = jsoup.select('.location, [class*="location"], .app-location')
+    for el in loc_spots:
+        page_location = el.get_text(strip=True)
+        if page_location:
+            break
+
+    # Description
+    main = jsoup.select_one('.content, .opening, .job, .application, #content') or jsoup
+    for tag in main(['script', 'style']):
+        tag.decompose()
+    desc_text = ' '.join(main.get_text(separator=' ', strip=True).split())
+    return page_location, desc_text, _extract_posted_from_dom(jsoup)
+
+def _parse_job_page(job_html: str) -> tuple[str, str, str | None]:
+    """
+    GH job page HTML -> (location, description, posted_iso).
+    Only <body> becomes a tree (lxml's own when installed, else a strained soup);
+    JSON-LD is read from the raw markup.
+    """
+    if not job_html:
+        return '', '', None
+    body = lxml_body(job_html)
+    page_location, desc_text, dom_posted = _job_page_lxml(body) if body is not None else _job_page_soup(job_html)
+    # Posted date (best-effort)
+    return page_location, desc_text, _extract_posted_from_jsonld(job_html) or dom_posted
+
+def _job_page_details(url: str) -> tuple[str, str, str | None]:
+    """Fetch one GH job page -> (location, description, posted_iso); blanks on failure."""
+    try:
+        return _parse_job_page(get_text(url))
+    except Exception:
+        # If parsing fails for this job, continue; minimal record still gets written
+        return '', '', None
+
+async def _ajob_page_details(url: str, sem: asyncio.Semaphore) -> tuple[str, str, str | None]:
+    try:
+        async with sem:
+            job_html = await aget_text(url)
+        return _parse_job_page(job_html)
+    except Exception:
+        return '', '', None
+
+# Board lists live in <section> (classic: section > div.opening) or <ul>/<li>
+_BOARD_LISTS = SoupStrainer(['section', 'ul', 'li'])
+
+def _parse_board(html: str, slug: str) -> list[tuple[str, str, str]]:
+    """Board HTML -> [(title, url, list_location)] per unique posting, in board order."""
+    # Parse just the list containers; other layouts get the whole tree and the loose anchor scan
+    return (_board_postings(parse(html, _BOARD_LISTS), slug, loose=False)
+            or _board_postings(parse(html), slug, loose=True))
+
+def _board_postings(soup: BeautifulSoup, slug: str, loose: bool) -> list[tuple[str, str, str]]:
+    anchors = {}  # insertion-ordered set, so results follow the board's order
 
     # Classic layout
     for a in soup.select('div.opening a'):
-        anchors.add(a)
+        anchors[a] = None
 
     # Section/list-based layouts
     for a in soup.select('section#jobs a, ul a, li a'):
         href = (a.get('href') or '')
         if slug in href and '/jobs/' in href:
-            anchors.add(a)
+            anchors[a] = None
 
     # Fallback: anything that looks like a posting link
-    if not anchors:
+    if not anchors and loose:
         for a in soup.find_all('a', href=True):
             href = a['href']
             if slug in href and '/jobs/' in href:
-                anchors.add(a)
+                anchors[a] = None
 
+    postings = []
     seen = set()
     for a in anchors:
         title = a.get_text(strip=True)
@@ -104,49 +165,101 @@ def crawl_greenhouse(slug: str):
             if loc_el:
                 list_location = loc_el.get_text(strip=True)
 
-        # Pull details from job page
-        page_location = ''
-        desc_text = ''
-        posted_iso = None
-
-        try:
-            job_html = get_text(full)
-            if job_html:
-                jsoup = BeautifulSoup(job_html, 'html.parser')
-
-                # Try common location spots on GH job page
-                loc_spots = jsoup.select('.location, [class*="location"], .app-location')
-                for el in loc_spots:
-                    page_location = el.get_text(strip=True)
-                    if page_location:
-                        break
-
-                # Description
-                main = jsoup.select_one('.content, .opening, .job, .application, #content') or jsoup
-                for tag in main(['script', 'style']):
-                    tag.decompose()
-                desc_text = ' '.join(main.get_text(separator=' ', strip=True).split())
-
-                # Posted date (best-effort)
-                posted_iso = _extract_posted_from_jsonld(jsoup) or _extract_posted_from_dom(jsoup)
-        except Exception:
-            # If parsing fails for this job, continue; minimal record still gets written
-            pass
-
-        location = page_location or list_location
-
-        j = Job(
+        postings.append((title, full, list_location))
+    return postings
+
+def _build_jobs(slug: str, postings, details) -> list[Job]:
+    jobs = []
+    for (title, full, list_location), detail in zip(postings, details):
+        page_location, desc_text, posted_iso = detail or ('', '', None)
+        jobs.append(Job(
             title=title,
             company=slug,
-            location=location,
+            location=page_location or list_location,
             url=full,
             description=desc_text,
-            source='greenhouse'
-        ).to_dict()
+            source='greenhouse',
+            posted_at=posted_iso,
+            detail_skipped=detail is None,
+        ))
+    return jobs
 
-        if posted_iso:
-            j['posted_at'] = posted_iso
+def _content_text(content: str) -> str:
+    """API `content` (HTML-escaped HTML) -> whitespace-normalized text."""
+    return page_text(htmllib.unescape(content))
 
-        jobs.append(j)
+def _api_url(slug: str) -> str:
+    # Public boards API: every posting with its content in one response
+    return f"https://boards-api.greenhouse.io/v1/boards/{slug}/jobs?content=true"
 
+def _jobs_from_api(slug: str, data) -> list[Job] | None:
+    """
+    Boards API payload -> jobs; None if the payload isn't usable (caller falls back to HTML).
+    Descriptions are converted from HTML lazily, only for postings someone reads.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('jobs'), list):
+        return None
+    jobs = []
+    for p in data['jobs']:
+        if not isinstance(p, dict):
+            continue
+        title = (p.get('title') or '').strip()
+        url = (p.get('absolute_url') or '').strip()
+        if not title or not url:
+            continue
+
+        content = p.get('content') or ''
+        jobs.append(Job(
+            title=title,
+            company=slug,
+            location=((p.get('location') or {}).get('name') or '').strip(),
+            url=url,
+            source='greenhouse',
+            posted_at=_parse_date_iso(str(p.get('first_published') or p.get('updated_at') or '')),
+            describe=(lambda c=content: _content_text(c)) if content else None,
+        ))
     return jobs
+
+def crawl_greenhouse(slug: str, workers: int | None = None, skip_detail=None):
+    """
+    Boards JSON API first (one request per board); HTML scrape + per-job pages as fallback.
+    skip_detail(url) -> True leaves that posting's job page unfetched on the HTML path;
+    the job is returned with list-page fields only and detail_skipped=True (incremental crawls).
+    """
+    jobs = _jobs_from_api(slug, get_json(_api_url(slug)))
+    if jobs is not None:
+        return jobs
+
+    board_url = f"https://boards.greenhouse.io/{slug}"
+    html = get_text(board_url)
+    if not html:
+        return []
+    postings = _parse_board(html, slug)
+    wanted = [p[1] for p in postings if not (skip_detail and skip_detail(p[1]))]
+
+    # Pull details from job pages with a bounded pool; map() keeps board order and
+    # the per-host cap in utils keeps us polite however many workers are running.
+    n = max(1, min(workers or INGEST_WORKERS, len(wanted) or 1))
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        fetched = dict(zip(wanted, pool.map(_job_page_details, wanted)))
+
+    return _build_jobs(slug, postings, [fetched.get(p[1]) for p in postings])
+
+async def acrawl_greenhouse(slug: str, workers: int | None = None, skip_detail=None):
+    """Async crawl_greenhouse: detail pages are gathered on the running event loop."""
+    jobs = _jobs_from_api(slug, await aget_json(_api_url(slug)))
+    if jobs is not None:
+        return jobs
+
+    board_url = f"https://boards.greenhouse.io/{slug}"
+    html = await aget_text(board_url)
+    if not html:
+        return []
+    postings = _parse_board(html, slug)
+    wanted = [p[1] for p in postings if not (skip_detail and skip_detail(p[1]))]
+
+    sem = asyncio.Semaphore(max(1, workers or INGEST_WORKERS))
+    details = await asyncio.gather(*(_ajob_page_details(u, sem) for u in wanted))
+    fetched = dict(zip(wanted, details))
+
+    return _build_jobs(slug, postings, [fetched.get(p[1]) for p in postings])
@@ -0,0 +1,101 @@
+# src/ingest/htmlparse.py
+"""
+HTML parsing for the providers and JD fetches.
+
+parse() builds the BeautifulSoup tree with lxml when it is installed (the
+stdlib html.parser is slower on large pages) and, given a SoupStrainer, only
+creates the elements the caller reads: list pages keep their cards/anchors,
+job pages their <body>. JSON-LD blocks come straight from the markup with a
+regex, so finding datePosted needs no tree at all.
+
+Large job pages, where even a strained soup costs more than the fetch, can
+skip bs4: lxml_body() hands back lxml.html's own tree (C-built, queried with
+XPath) and text_of() flattens it the way get_text(strip=True) would. Both
+return None without lxml, and callers keep a bs4 path for that case.
+
+Env:
+  HTML_PARSER   bs4 backend to use (default: lxml if importable, else html.parser)
+"""
+import html as htmllib
+import json
+import os
+import re
+from typing import Iterator, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # optional: bs4 with html.parser covers everything, just slower
+    etree = lxml_html = None
+
+PARSER = os.getenv("HTML_PARSER") or ("lxml" if lxml_html is not None else "html.parser")
+
+BODY = SoupStrainer("body")
+
+_JSON_LD_RE = re.compile(
+    r"<script\b[^>]*\btype\s*=\s*[\"']?application/ld\+json[\"']?[^>]*>(.*?)</script\s*>",
+    re.I | re.S,
+)
+
+def has_class(*names: str) -> re.Pattern:
+    """Strainer value matching any of these classes (the class attribute is still one raw string at parse time)."""
+    return re.compile(r"(?:^|\s)(?:%s)(?:\s|$)" % "|".join(map(re.escape, names)))
+
+def parse(html: str, only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Tree for `html`; with `only`, just the matching elements (and everything inside them)."""
+    return BeautifulSoup(html or "", PARSER, parse_only=only)
+
+def parse_body(html: str) -> BeautifulSoup:
+    """The <body> subtree; markup without one (fragments) is parsed whole."""
+    soup = parse(html, BODY)
+    return soup if soup.find("body") else parse(html)
+
+def json_ld(html: str) -> Iterator[object]:
+    """Every parseable application/ld+json block in the page, in document order."""
+    for m in _JSON_LD_RE.finditer(html or ""):
+        raw = m.group(1).strip()
+        if raw.startswith("<!--"):
+            raw = raw[4:].rsplit("-->", 1)[0]
+        try:
+            yield json.loads(raw)
+        except ValueError:
+            try:
+                yield json.loads(htmllib.unescape(raw))
+            except ValueError:
+                continue
+
+# ---------- lxml.html fast path ----------
+def lxml_body(html: str):
+    """
+    <body> of an lxml.html document with comments, <script> and <style>
+    removed; None without lxml or when lxml can't parse the markup.
+    """
+    if lxml_html is None or not (html or "").strip():
+        return None
+    try:
+        try:
+            root = lxml_html.document_fromstring(html)
+        except ValueError:  # str carrying an XML encoding declaration
+            root = lxml_html.document_fromstring(html.encode("utf-8"), parser=lxml_html.HTMLParser(encoding="utf-8"))
+    except (etree.ParserError, ValueError):
+        return None
+    body = root.find("body")
+    if body is None:
+        body = root
+    etree.strip_elements(body, etree.Comment, "script", "style", with_tail=False)
+    return body
+
+def text_of(el, separator: str = " ") -> str:
+    """Like bs4's el.get_text(separator, strip=True) for an lxml element."""
+    return separator.join(s for s in (t.strip() for t in el.itertext()) if s)
+
+def page_text(html: str) -> str:
+    """Whitespace-normalized text of a page or fragment, minus scripts and styles."""
+    body = lxml_body(html)
+    if body is not None:
+        return " ".join(text_of(body).split())
+    soup = parse(html)
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    return " ".join(soup.get_text(separator=" ", strip=True).split())
@@ -0,0 +1,146 @@
+# src/ingest/httpcache.py
+"""
+On-disk conditional-GET cache for board/posting fetches.
+
+One JSON file per URL holds the body plus its validators (ETag / Last-Modified).
+utils.get_text/get_json (and the async variants) send If-None-Match /
+If-Modified-Since from here and serve 304 responses from disk.
+
+Env:
+  INGEST_CACHE=0               disable entirely
+  INGEST_CACHE_DIR             default data/http_cache
+  INGEST_CACHE_MAX_MB          default 256 (least-recently-used entries evicted past this)
+  INGEST_CACHE_MAX_AGE_DAYS    default 14 (entries not used for this long are dropped)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+def _env_flag(name: str, default: bool = True) -> bool:
+    return str(os.getenv(name, "1" if default else "0")).strip().lower() not in ("", "0", "false", "no")
+
+class HttpCache:
+    def __init__(self, root: str, max_bytes: int, max_age_s: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Stored entry for url (with 'etag'/'last_modified'/'body'), or None."""
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except Exception:
+            return None
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: Optional[dict]) -> dict:
+        h = {}
+        if entry:
+            if entry.get("etag"):
+                h["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                h["If-Modified-Since"] = entry["last_modified"]
+        return h
+
+    def hit(self, url: str, entry: dict) -> str:
+        """Count a 304 served from disk; bumps the entry's mtime for LRU eviction."""
+        body = entry.get("body") or ""
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(body.encode("utf-8"))
+        try:
+            os.utime(self._path(url))
+        except OSError:
+            pass
+        return body
+
+    def store(self, url: str, body: str, headers) -> None:
+        """Count a full download; keep it only if the server gave us validators."""
+        with self._lock:
+            self.misses += 1
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return
+        path = self._path(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "url": url,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "stored_at": time.time(),
+                    "body": body,
+                }, f)
+            os.replace(tmp, path)
+        except OSError:
+            try: os.remove(tmp)
+            except OSError: pass
+
+    def evict(self) -> int:
+        """Drop entries unused for max_age, then LRU entries until under max_bytes."""
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime > self.max_age_s or name.endswith(".tmp"):
+                try:
+                    os.remove(path); removed += 1
+                except OSError:
+                    pass
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(e[1] for e in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path); removed += 1
+                total -= size
+            except OSError:
+                pass
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes_saved": self.bytes_saved}
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+def http_cache() -> Optional[HttpCache]:
+    """Process-wide cache, or None when INGEST_CACHE is off."""
+    global _cache
+    if not _env_flag("INGEST_CACHE", True):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(
+                root=os.getenv("INGEST_CACHE_DIR") or os.path.join(ROOT, "data", "http_cache"),
+                max_bytes=int(float(os.getenv("INGEST_CACHE_MAX_MB", "256")) * 1024 * 1024),
+                max_age_s=float(os.getenv("INGEST_CACHE_MAX_AGE_DAYS", "14")) * 86400,
+            )
+        return _cache
@@ -1,9 +1,11 @@
 # src/ingest/indeed.py
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+import asyncio
 from urllib.parse import urlencode, quote_plus, urljoin
 from datetime import datetime, timezone
-import time, requests
 
+from .utils import get_text, aget_text
+from .htmlparse import parse, has_class
 from src.core.schema import Job
 from src.core.scoring import tokens_from_terms
 
@@ -44,70 +46,85 @@ def _build_search_urls(profile: dict) -> list[str]:
     return urls
 
 def _fetch(url: str) -> str | None:
-    try:
-        r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=20)
-        if r.status_code != 200:
-            return None
-        return r.text
-    except Exception:
-        return None
+    # shared client: retries, conditional-GET cache and the per-host rate limiter
+    html = get_text(url, timeout=20, headers={"User-Agent": USER_AGENT})
+    return html or None
+
+async def _afetch(url: str) -> str | None:
+    html = await aget_text(url, timeout=20, headers={"User-Agent": USER_AGENT})
+    return html or None
+
+# only the result cards (a.tapItem and what's inside) become a tree
+_CARDS = SoupStrainer("a", class_=has_class("tapItem"))
+
+def _parse_cards(html: str) -> list[Job]:
+    out = []
+    soup = parse(html, _CARDS)
+
+    # Modern Indeed list items often have:
+    # <a class="tapItem" href="/rc/clk?jk=..." >
+    #   <h2 class="jobTitle">...</h2>
+    #   <span class="companyName">...</span>
+    #   <div class="companyLocation">...</div>
+    #   <div class="job-snippet">...</div>
+    #   <span class="date">...</span>
+    # </a>
+    for a in soup.select("a.tapItem"):
+        try:
+            href = a.get("href")
+            if not href:
+                continue
+            full_url = href if href.startswith("http") else urljoin("https://www.indeed.com", href)
+
+            title_el = a.select_one("h2.jobTitle")
+            title = (title_el.get_text(" ", strip=True) if title_el else "").strip()
+
+            comp_el = a.select_one(".companyName")
+            company = comp_el.get_text(" ", strip=True) if comp_el else ""
+
+            loc_el = a.select_one(".companyLocation")
+            location = loc_el.get_text(" ", strip=True) if loc_el else ""
+
+            snip_el = a.select_one(".job-snippet")
+            snippet = snip_el.get_text(" ", strip=True) if snip_el else ""
+
+            date_el = a.select_one("span.date")
+            posted_iso = None
+            if date_el:
+                # "Just posted", "3 days ago", etc. -> keep raw text
+                txt = date_el.get_text(" ", strip=True)
+                posted_iso = None  # leave None; relative text is too fuzzy for ISO
+
+            out.append(
+                Job(
+                    title=title,
+                    company=company,
+                    location=location,
+                    url=full_url,
+                    description=snippet,
+                    source="indeed",
+                )
+            )
+        except Exception:
+            continue
+    return out
 
-def crawl_indeed(profile: dict) -> list[dict]:
+def crawl_indeed(profile: dict) -> list[Job]:
     out = []
     for url in _build_search_urls(profile):
         html = _fetch(url)
         if not html:
             continue
 
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Modern Indeed list items often have:
-        # <a class="tapItem" href="/rc/clk?jk=..." >
-        #   <h2 class="jobTitle">...</h2>
-        #   <span class="companyName">...</span>
-        #   <div class="companyLocation">...</div>
-        #   <div class="job-snippet">...</div>
-        #   <span class="date">...</span>
-        # </a>
-        for a in soup.select("a.tapItem"):
-            try:
-                href = a.get("href")
-                if not href:
-                    continue
-                full_url = href if href.startswith("http") else urljoin("https://www.indeed.com", href)
-
-                title_el = a.select_one("h2.jobTitle")
-                title = (title_el.get_text(" ", strip=True) if title_el else "").strip()
-
-                comp_el = a.select_one(".companyName")
-                company = comp_el.get_text(" ", strip=True) if comp_el else ""
-
-                loc_el = a.select_one(".companyLocation")
-                location = loc_el.get_text(" ", strip=True) if loc_el else ""
-
-                snip_el = a.select_one(".job-snippet")
-                snippet = snip_el.get_text(" ", strip=True) if snip_el else ""
-
-                date_el = a.select_one("span.date")
-                posted_iso = None
-                if date_el:
-                    # "Just posted", "3 days ago", etc. -> keep raw text
-                    txt = date_el.get_text(" ", strip=True)
-                    posted_iso = None  # leave None; relative text is too fuzzy for ISO
-
-                out.append(
-                    Job(
-                        title=title,
-                        company=company,
-                        location=location,
-                        url=full_url,
-                        description=snippet,
-                        source="indeed",
-                    ).to_dict()
-                )
-            except Exception:
-                continue
+        out.extend(_parse_cards(html))
 
-        time.sleep(0.8)
+    return out
 
+async def acrawl_indeed(profile: dict) -> list[Job]:
+    """Async crawl_indeed: search pages are fetched together, paced by the per-host rate limiter."""
+    out = []
+    pages = await asyncio.gather(*(_afetch(url) for url in _build_search_urls(profile)))
+    for html in pages:
+        if html:
+            out.extend(_parse_cards(html))
     return out
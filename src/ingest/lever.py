@@ -1,4 +1,4 @@
-from .utils import get_json
+from .utils import get_json, aget_json
 from src.core.schema import Job
 from datetime import datetime, timezone
 
@@ -10,29 +10,36 @@ def _ms_to_iso(ms) -> str | None:
     except Exception:
         return None
 
-def crawl_lever(slug: str):
-    url = f"https://api.lever.co/v0/postings/{slug}?mode=json"
-    data = []
-    try:
-        data = get_json(url) or []
-    except Exception:
-        data = []
+def _jobs_from_postings(slug: str, data) -> list[Job]:
     jobs = []
-    for p in data:
-        j = Job(
+    for p in data or []:
+        # Lever has createdAt (ms since epoch)
+        created = p.get('createdAt')
+        jobs.append(Job(
             title=p.get('text',''),
             company=slug,
             location=(p.get('categories') or {}).get('location',''),
             url=p.get('hostedUrl',''),
             description=p.get('descriptionPlain','') or '',
-            source='lever'
-        ).to_dict()
+            source='lever',
+            posted_at=_ms_to_iso(created) if created is not None else None,
+        ))
+    return jobs
 
-        # Lever has createdAt (ms since epoch)
-        created = p.get('createdAt')
-        iso = _ms_to_iso(created) if created is not None else None
-        if iso:
-            j['posted_at'] = iso
+def crawl_lever(slug: str):
+    url = f"https://api.lever.co/v0/postings/{slug}?mode=json"
+    data = []
+    try:
+        data = get_json(url) or []
+    except Exception:
+        data = []
+    return _jobs_from_postings(slug, data)
 
-        jobs.append(j)
-    return jobs
+async def acrawl_lever(slug: str):
+    url = f"https://api.lever.co/v0/postings/{slug}?mode=json"
+    data = []
+    try:
+        data = await aget_json(url) or []
+    except Exception:
+        data = []
+    return _jobs_from_postings(slug, data)
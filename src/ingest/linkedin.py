@@ -1,10 +1,11 @@
 # src/ingest/linkedin.py
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+import asyncio
 from datetime import datetime, timedelta, timezone
 from urllib.parse import quote_plus
-import time, requests
 
-from .utils import get_text          # you already use this pattern; if it enforces UA/timeouts, great
+from .utils import get_text, aget_text   # you already use this pattern; if it enforces UA/timeouts, great
+from .htmlparse import parse, has_class
 from src.core.schema import Job
 from src.core.scoring import tokens_from_terms
 
@@ -45,74 +46,87 @@ def _build_search_urls(profile: dict) -> list[str]:
     return urls
 
 def _fetch(url: str) -> str | None:
-    # use requests directly (get_text may be fine too—keep consistent with your repo)
-    try:
-        r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=20)
-        if r.status_code != 200:
-            return None
-        return r.text
-    except Exception:
-        return None
+    # shared client: retries, conditional-GET cache and the per-host rate limiter
+    html = get_text(url, timeout=20, headers={"User-Agent": USER_AGENT})
+    return html or None
+
+async def _afetch(url: str) -> str | None:
+    html = await aget_text(url, timeout=20, headers={"User-Agent": USER_AGENT})
+    return html or None
+
+# only the result cards become a tree; the rest of the search page is skipped
+_CARDS = SoupStrainer(["div", "li"], class_=has_class("base-search-card", "base-card"))
+
+def _parse_cards(html: str) -> list[Job]:
+    out = []
+    soup = parse(html, _CARDS)
+
+    # Cards often look like:
+    # <a class="base-card__full-link" href="..." >TITLE</a>
+    # <h4 class="base-search-card__subtitle">COMPANY</h4>
+    # <span class="job-search-card__location">LOCATION</span>
+    # <time datetime="2025-09-23">...</time>
+    for card in soup.select("div.base-search-card, li.base-card"):
+        try:
+            a = card.select_one("a.base-card__full-link, a.job-card-container__link")
+            if not a or not a.get("href"):
+                continue
+            url = a.get("href").split("?")[0].strip()
+
+            title = (a.get_text(strip=True) or "").strip()
+
+            comp_el = card.select_one(".base-search-card__subtitle, .job-card-container__company-name")
+            company = comp_el.get_text(strip=True) if comp_el else ""
+
+            loc_el = card.select_one(".job-search-card__location")
+            location = loc_el.get_text(strip=True) if loc_el else ""
+
+            time_el = card.find("time")
+            posted_iso = None
+            if time_el and time_el.get("datetime"):
+                try:
+                    dt = datetime.fromisoformat(time_el["datetime"].replace("Z", "+00:00"))
+                    posted_iso = dt.date().isoformat()
+                except Exception:
+                    posted_iso = None
+
+            # Description snippet is not reliably present on the list page;
+            # grab the summary line if available.
+            desc_el = card.select_one(".job-search-card__snippet, .result-benefits__text")
+            snippet = (desc_el.get_text(" ", strip=True) if desc_el else "").strip()
+
+            out.append(
+                Job(
+                    title=title,
+                    company=company,
+                    location=location,
+                    url=url,
+                    description=snippet,
+                    source="linkedin",
+                    posted_at=posted_iso,
+                )
+            )
+        except Exception:
+            continue
+    return out
 
-def crawl_linkedin(profile: dict) -> list[dict]:
-    """Return a list[Job.to_dict()] from public LinkedIn job search pages."""
+def crawl_linkedin(profile: dict) -> list[Job]:
+    """Return a list[Job] from public LinkedIn job search pages."""
     out = []
     for url in _build_search_urls(profile):
         html = _fetch(url)
         if not html:
             continue
 
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Cards often look like:
-        # <a class="base-card__full-link" href="..." >TITLE</a>
-        # <h4 class="base-search-card__subtitle">COMPANY</h4>
-        # <span class="job-search-card__location">LOCATION</span>
-        # <time datetime="2025-09-23">...</time>
-        for card in soup.select("div.base-search-card, li.base-card"):
-            try:
-                a = card.select_one("a.base-card__full-link, a.job-card-container__link")
-                if not a or not a.get("href"):
-                    continue
-                url = a.get("href").split("?")[0].strip()
-
-                title = (a.get_text(strip=True) or "").strip()
-
-                comp_el = card.select_one(".base-search-card__subtitle, .job-card-container__company-name")
-                company = comp_el.get_text(strip=True) if comp_el else ""
-
-                loc_el = card.select_one(".job-search-card__location")
-                location = loc_el.get_text(strip=True) if loc_el else ""
-
-                time_el = card.find("time")
-                posted_iso = None
-                if time_el and time_el.get("datetime"):
-                    try:
-                        dt = datetime.fromisoformat(time_el["datetime"].replace("Z", "+00:00"))
-                        posted_iso = dt.date().isoformat()
-                    except Exception:
-                        posted_iso = None
-
-                # Description snippet is not reliably present on the list page;
-                # grab the summary line if available.
-                desc_el = card.select_one(".job-search-card__snippet, .result-benefits__text")
-                snippet = (desc_el.get_text(" ", strip=True) if desc_el else "").strip()
-
-                out.append(
-                    Job(
-                        title=title,
-                        company=company,
-                        location=location,
-                        url=url,
-                        description=snippet,
-                        source="linkedin",
-                    ).to_dict()
-                    | ({ "posted_at": posted_iso } if posted_iso else {})
-                )
-            except Exception:
-                continue
+        out.extend(_parse_cards(html))
 
-        # light politeness delay
-        time.sleep(0.8)
+    return out
 
+async def acrawl_linkedin(profile: dict) -> list[Job]:
+    """Async crawl_linkedin: search pages are fetched together, paced by the per-host rate limiter."""
+    out = []
+    pages = await asyncio.gather(*(_afetch(url) for url in _build_search_urls(profile)))
+    for html in pages:
+        if html:
+            out.extend(_parse_cards(html))
     return out
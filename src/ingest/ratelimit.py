@@ -0,0 +1,117 @@
+# src/ingest/ratelimit.py
+"""
+Per-host token buckets shared by every ingest fetch (sync and async).
+
+Each host gets `rate` requests/second with bursts up to `burst`. A 429 (or any
+response with Retry-After) blocks the host for the advertised time and halves
+its rate; each success then wins back a tenth of the configured rate.
+
+Env:
+  INGEST_RATE_LIMITS="default=4/8,www.linkedin.com=1/1,www.indeed.com=1/1"
+      host=rate/burst pairs; entries merge over the defaults below.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+DEFAULT_LIMITS = {
+    "default": (4.0, 8),
+    # search pages: the old providers slept 0.8s between these
+    "www.linkedin.com": (1.0, 1),
+    "www.indeed.com": (1.0, 1),
+}
+MIN_RATE_FRACTION = 1 / 16     # adaptive slow-down never goes below this share of the configured rate
+DEFAULT_PENALTY_S = 2.0        # 429 without a usable Retry-After
+
+def _parse_limits(spec: str) -> dict[str, tuple[float, int]]:
+    limits = dict(DEFAULT_LIMITS)
+    for part in (spec or "").split(","):
+        host, _, val = part.partition("=")
+        rate, _, burst = val.partition("/")
+        try:
+            r = float(rate)
+            b = int(burst) if burst.strip() else max(1, int(r))
+        except ValueError:
+            continue
+        if host.strip() and r > 0:
+            limits[host.strip().lower()] = (r, max(1, b))
+    return limits
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token now; return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def throttle(self, seconds: Optional[float]):
+        """Server pushed back: block for `seconds`, halve the rate, drop saved-up burst."""
+        with self._lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + (seconds if seconds is not None else DEFAULT_PENALTY_S))
+            self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self.updated = now
+
+    def recover(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+class RateLimiter:
+    def __init__(self, limits: dict[str, tuple[float, int]]):
+        self.limits = limits
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = (urlparse(url).netloc or "").lower()
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                rate, burst = self.limits.get(host) or self.limits["default"]
+                b = self._buckets[host] = TokenBucket(rate, burst)
+            return b
+
+    def acquire(self, url: str):
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, url: str):
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def feedback(self, url: str, status: int, retry_after: Optional[float] = None):
+        """Report a response: 429 (or any Retry-After) throttles the host, success recovers it."""
+        if status == 429 or retry_after is not None:
+            self.bucket(url).throttle(retry_after)
+        elif status < 400:
+            self.bucket(url).recover()
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def rate_limiter() -> RateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(_parse_limits(os.getenv("INGEST_RATE_LIMITS", "")))
+        return _limiter
@@ -1,15 +1,47 @@
 # src/ingest/utils.py
+import asyncio
 import json
-import random
+import os
+import threading
 import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
 from typing import Any, Optional
+from urllib.parse import urlparse
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .httpcache import HttpCache, http_cache
+from .ratelimit import rate_limiter
+
+try:
+    import aiohttp  # optional: native async fetching (falls back to worker threads)
+except Exception:
+    aiohttp = None
+
+# Politeness: max simultaneous requests to a single host (shared by all threads)
+INGEST_PER_HOST = max(1, int(os.getenv("INGEST_PER_HOST", "4")))
+# Default worker count for providers that fan out detail-page fetches
+INGEST_WORKERS = max(1, int(os.getenv("INGEST_WORKERS", "6")))
+
+# Retry/pool policy shared by the sync and async clients
+_RETRY_TOTAL = 4
+_BACKOFF_FACTOR = 0.6
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+_RETRY_AFTER_STATUSES = (413, 429, 503)   # same set urllib3 honors Retry-After for
+_POOL_SIZE = 20
+DEFAULT_HEADERS = {
+    "User-Agent": "job-copilot/1.0 (+https://github.com/AlbertoRoca96/job-copilot)",
+    "Accept": "text/html,application/json;q=0.9,*/*;q=0.8",
+}
+
 # Reusable session with retries/backoff
 _session: Optional[requests.Session] = None
+_host_slots: dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
 
 def _get_session() -> requests.Session:
     global _session
@@ -17,53 +49,200 @@ def _get_session() -> requests.Session:
         return _session
     s = requests.Session()
     retries = Retry(
-        total=4,                # up to 4 retry attempts
-        connect=4,
-        read=4,
-        status=4,
-        backoff_factor=0.6,     # 0.6s, 1.2s, 2.4s, 4.8s…
-        status_forcelist=(429, 500, 502, 503, 504),
+        total=_RETRY_TOTAL,                # up to 4 retry attempts
+        connect=_RETRY_TOTAL,
+        read=_RETRY_TOTAL,
+        status=_RETRY_TOTAL,
+        backoff_factor=_BACKOFF_FACTOR,    # 0.6s, 1.2s, 2.4s, 4.8s…
+        status_forcelist=_RETRY_STATUSES,
         allowed_methods=frozenset(["GET", "HEAD"]),
         raise_on_status=False,
         respect_retry_after_header=True,
     )
-    adapter = HTTPAdapter(max_retries=retries, pool_connections=20, pool_maxsize=20)
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=_POOL_SIZE, pool_maxsize=_POOL_SIZE)
     s.mount("http://", adapter)
     s.mount("https://", adapter)
-    s.headers.update({
-        "User-Agent": "job-copilot/1.0 (+https://github.com/AlbertoRoca96/job-copilot)",
-        "Accept": "text/html,application/json;q=0.9,*/*;q=0.8",
-    })
+    s.headers.update(DEFAULT_HEADERS)
     _session = s
     return s
 
-def _sleep_jitter(min_ms=120, max_ms=380):
-    # polite delay to avoid getting rate limited
-    time.sleep(random.uniform(min_ms/1000.0, max_ms/1000.0))
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+def _report(url: str, resp: requests.Response):
+    """Tell the rate limiter how the host answered, including 429s urllib3 retried internally."""
+    history = getattr(getattr(resp.raw, "retries", None), "history", None) or ()
+    retry_after = None
+    if resp.status_code in _RETRY_AFTER_STATUSES:
+        retry_after = _retry_after_seconds(resp.headers.get("Retry-After"))
+    elif any(h.status == 429 for h in history):
+        retry_after = 0.0   # recovered after a 429: slow down, but no need to block
+    rate_limiter().feedback(url, resp.status_code, retry_after)
+
+@contextmanager
+def _host_slot(url: str):
+    """Hold one of INGEST_PER_HOST slots for the URL's host while fetching."""
+    host = (urlparse(url).netloc or "").lower()
+    with _host_slots_lock:
+        sem = _host_slots.get(host)
+        if sem is None:
+            sem = _host_slots[host] = threading.BoundedSemaphore(INGEST_PER_HOST)
+    with sem:
+        yield
 
-def get_text(url: str, timeout: float = 15.0) -> str:
+def _get(url: str, timeout: float, headers: Optional[dict]) -> tuple[int, str]:
+    """GET through the shared session + conditional-GET cache -> (status, text)."""
+    cache = http_cache()
+    entry = cache.lookup(url) if cache else None
+    hdrs = {**(headers or {}), **HttpCache.conditional_headers(entry)}
+    s = _get_session()
+    with _host_slot(url):
+        rate_limiter().acquire(url)
+        resp = s.get(url, timeout=timeout, headers=hdrs or None)
+    _report(url, resp)
+    if resp.status_code >= 400:
+        return resp.status_code, ""
+    if resp.status_code == 304 and entry:
+        return 200, cache.hit(url, entry)
+    text = resp.text or ""
+    if cache and resp.status_code < 300:
+        cache.store(url, text, resp.headers)
+    return resp.status_code, text
+
+def get_text(url: str, timeout: float = 15.0, headers: Optional[dict] = None) -> str:
     """Fetch URL and return text; return '' on failure."""
     try:
-        s = _get_session()
-        resp = s.get(url, timeout=timeout)
-        if resp.status_code >= 400:
-            return ""
-        _sleep_jitter()
-        return resp.text or ""
+        status, text = _get(url, timeout, headers)
+        return text if status < 400 else ""
     except Exception:
         return ""
 
-def get_json(url: str, timeout: float = 15.0) -> Any:
+def get_json(url: str, timeout: float = 15.0, headers: Optional[dict] = None) -> Any:
     """Fetch URL and parse JSON; return None on failure."""
     try:
-        s = _get_session()
-        resp = s.get(url, timeout=timeout)
-        if resp.status_code >= 400:
+        status, text = _get(url, timeout, headers)
+        if status >= 400 or not text:
             return None
-        _sleep_jitter()
         try:
-            return resp.json()
+            return json.loads(text)
         except json.JSONDecodeError:
             return None
     except Exception:
         return None
+
+# ---------- asyncio counterpart ----------
+
+class _AsyncSession:
+    """Pooled aiohttp session plus per-host slots, scoped to one event loop."""
+    def __init__(self):
+        self.client = None
+        self.slots: dict[str, asyncio.Semaphore] = {}
+
+    def slot(self, url: str) -> asyncio.Semaphore:
+        host = (urlparse(url).netloc or "").lower()
+        sem = self.slots.get(host)
+        if sem is None:
+            sem = self.slots[host] = asyncio.Semaphore(INGEST_PER_HOST)
+        return sem
+
+_asession: ContextVar[Optional[_AsyncSession]] = ContextVar("ingest_async_session", default=None)
+
+@asynccontextmanager
+async def async_session():
+    """
+    Share one pooled async session across every aget_* call inside the block.
+    Nested use reuses the outer session; without aiohttp the block is a no-op
+    and aget_* run the sync client in worker threads.
+    """
+    current = _asession.get()
+    if current is not None:
+        yield current
+        return
+    sess = _AsyncSession()
+    if aiohttp is not None:
+        sess.client = aiohttp.ClientSession(
+            headers=DEFAULT_HEADERS,
+            connector=aiohttp.TCPConnector(limit=_POOL_SIZE, limit_per_host=INGEST_PER_HOST),
+        )
+    token = _asession.set(sess)
+    try:
+        yield sess
+    finally:
+        _asession.reset(token)
+        if sess.client is not None:
+            await sess.client.close()
+
+async def _afetch(url: str, timeout: float, headers: Optional[dict]) -> Optional[tuple[int, str]]:
+    """
+    GET with the same retry/backoff policy as the sync session -> (status, text).
+    The per-host slot is held for one attempt at a time, never across a backoff,
+    and cache reads/writes run in worker threads, off the event loop.
+    """
+    sess = _asession.get()
+    if sess is None:
+        async with async_session():
+            return await _afetch(url, timeout, headers)
+    cache = http_cache()
+    entry = await asyncio.to_thread(cache.lookup, url) if cache else None
+    hdrs = {**(headers or {}), **HttpCache.conditional_headers(entry)}
+    limiter = rate_limiter()
+    for attempt in range(_RETRY_TOTAL + 1):
+        delay = done = None
+        async with sess.slot(url):
+            await limiter.aacquire(url)
+            try:
+                async with sess.client.get(url, headers=hdrs or None,
+                                           timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                    text = await resp.text(errors="replace")
+                    if resp.status in _RETRY_AFTER_STATUSES:
+                        delay = _retry_after_seconds(resp.headers.get("Retry-After"))
+                    limiter.feedback(url, resp.status, delay)
+                    if resp.status not in _RETRY_STATUSES or attempt == _RETRY_TOTAL:
+                        done = resp.status, text, resp.headers
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == _RETRY_TOTAL:
+                    return None
+        if done is not None:
+            status, text, resp_headers = done
+            if status == 304 and entry:
+                return 200, await asyncio.to_thread(cache.hit, url, entry)
+            if cache and status < 300:
+                await asyncio.to_thread(cache.store, url, text, resp_headers)
+            return status, text
+        if delay is None:   # with Retry-After the limiter already holds the host back
+            await asyncio.sleep(_BACKOFF_FACTOR * (2 ** attempt))
+    return None
+
+async def aget_text(url: str, timeout: float = 15.0, headers: Optional[dict] = None) -> str:
+    """Async get_text; return '' on failure."""
+    if aiohttp is None:
+        return await asyncio.to_thread(get_text, url, timeout, headers)
+    try:
+        res = await _afetch(url, timeout, headers)
+    except Exception:
+        return ""
+    if not res or res[0] >= 400:
+        return ""
+    return res[1] or ""
+
+async def aget_json(url: str, timeout: float = 15.0, headers: Optional[dict] = None) -> Any:
+    """Async get_json; return None on failure."""
+    if aiohttp is None:
+        return await asyncio.to_thread(get_json, url, timeout, headers)
+    text = await aget_text(url, timeout, headers)
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
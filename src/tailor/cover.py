@@ -5,7 +5,7 @@ from typing import Dict, List, Any, Optional, Tuple
 from urllib.parse import urlparse
 
 import requests
-from bs4 import BeautifulSoup
+from src.ingest.htmlparse import parse
 
 from src.ai.llm import craft_cover_sections
 
@@ -46,7 +46,7 @@ def _fetch(url: str) -> str:
         r = requests.get(url, headers={"User-Agent": UA, "Accept-Language":"en-US,en;q=0.8"},
                          timeout=TIMEOUT, allow_redirects=True)
         r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
+        soup = parse(r.text)
         for t in soup(["script","style","noscript","svg","img","nav","header","footer","form"]):
             t.decompose()
         main = soup.select_one("main, article, .content, #content, .page, body") or soup
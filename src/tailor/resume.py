@@ -4,7 +4,7 @@ from typing import List, Dict, Any, Optional, Tuple, Set
 from copy import deepcopy
 
 import requests
-from bs4 import BeautifulSoup
+from src.ingest.htmlparse import parse
 from docx import Document
 from docx.text.paragraph import Paragraph
 from docx.text.run import Run
@@ -129,7 +129,7 @@ def fetch_jd_plaintext(url: str) -> str:
     }, timeout=TIMEOUT, allow_redirects=True)
     resp.raise_for_status()
     html = resp.text
-    soup = BeautifulSoup(html, "html.parser")
+    soup = parse(html)
 
     for tag in soup(["script", "style", "noscript", "svg", "img"]):
         tag.decompose()
@@ -0,0 +1,72 @@
+# tests/test_board_status.py
+import asyncio, os, re, sys
+from urllib.parse import unquote
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+import crawl
+from src.core.postgrest import PatchBuffer
+
+_QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+class FakeBoards:
+    """public.boards in memory; PATCH applies eq./in. filters the way PostgREST does."""
+    def __init__(self, rows):
+        self.rows = [dict(r) for r in rows]
+        self.patches = 0
+
+    def buffer(self, table, key):
+        return PatchBuffer(self, table, key)
+
+    def patch(self, path, body, timeout=None):
+        table, query = path.split("?", 1)
+        assert table == "boards"
+        tests = []
+        for part in query.split("&"):
+            col, cond = part.split("=", 1)
+            op, val = cond.split(".", 1)
+            if op == "eq":
+                tests.append((col, {unquote(val)}))
+            else:
+                assert op == "in"
+                tests.append((col, {re.sub(r"\\(.)", r"\1", v) for v in _QUOTED.findall(unquote(val))}))
+        self.patches += 1
+        for row in self.rows:
+            if all(row[c] in vals for c, vals in tests):
+                row.update(body)
+
+def _run(monkeypatch, rows):
+    db = FakeBoards(rows)
+    monkeypatch.setattr(crawl, "client", lambda: db)
+    monkeypatch.setattr(crawl, "_board_status", None)
+    crawled = []
+
+    async def fake(slug, profile, skip):
+        crawled.append(slug)
+        return []
+    monkeypatch.setitem(crawl.CRAWLERS, "greenhouse", fake)
+    asyncio.run(crawl._crawl_boards("u1", {}, lambda j: True, db.rows))
+    crawl._flush_board_status()
+    return db, crawled
+
+def test_mixed_case_board_updates_existing_row(monkeypatch):
+    db, crawled = _run(monkeypatch, [
+        {"source": "greenhouse", "slug": "Stripe", "enabled": True, "status": None},
+        {"source": "Greenhouse", "slug": " acme ", "enabled": True, "status": None},
+        {"source": "greenhouse", "slug": "acme", "enabled": True, "status": None},
+        {"source": "bogus", "slug": "X", "enabled": True, "status": None},
+    ])
+    assert sorted(crawled) == ["acme", "stripe"]      # case/whitespace twins crawled once
+    assert len(db.rows) == 4                           # no row inserted
+    assert [r["status"] for r in db.rows] == ["ok", "ok", "ok", "skipped"]
+    assert all(r["last_crawled_at"] for r in db.rows)
+
+def test_unknown_key_changes_nothing(monkeypatch):
+    db = FakeBoards([{"source": "greenhouse", "slug": "stripe", "status": None}])
+    buf = db.buffer("boards", "source,slug")
+    buf.put(("greenhouse", "Stripe"), {"status": "ok"})
+    buf.put(("greenhouse", 'we"ird,(slug).'), {"status": "ok"})
+    assert buf.flush() == 2 and len(buf) == 0
+    assert db.rows == [{"source": "greenhouse", "slug": "stripe", "status": None}]
@@ -0,0 +1,49 @@
+# tests/test_dedup.py
+import os, sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from src.core.dedup import NearDupIndex, job_features, richness
+from rank import _collapse
+
+LOREM = ("We build data pipelines and services in python and sql for millions of "
+         "customers, working closely with product and design on reliable systems ")
+
+def _job(i, source="greenhouse", url=None, location="Remote", description="Join us.", title="Software Engineer",
+         company="Acme"):
+    return {"title": title, "company": company, "location": location, "source": source,
+            "url": url or f"https://boards.greenhouse.io/acme/jobs/{i}", "description": description}
+
+def _survivors(jobs):
+    """What rank keeps: _collapse over (score, -seq, (row, features, richness)) heap items, in arrival order."""
+    items = [(0.0, -seq, (job, job_features(job), richness(job))) for seq, job in enumerate(jobs)]
+    kept, dropped = _collapse(items)
+    assert len(kept) + dropped == len(jobs)
+    return [row for _, _, (row, _, _) in sorted(kept, key=lambda x: -x[1])]
+
+def test_same_title_postings_from_one_board_survive():
+    jobs = [_job(i) for i in range(6)] + [_job(10 + i, location="New York, NY") for i in range(6)]
+    assert len(_survivors(jobs)) == len(jobs)
+
+def test_same_title_snippet_across_sources_collapses():
+    full = _job(1, location="New York, NY", description=LOREM * 10)
+    snippet = _job(2, source="linkedin", url="https://www.linkedin.com/jobs/view/2",
+                   location="New York, United States", description="Build data pipelines.")
+    assert _survivors([snippet, full]) == [full]
+
+def test_unknown_locations_never_match_on_title_alone():
+    a = _job(1, location="Remote")
+    b = _job(2, source="linkedin", url="https://www.linkedin.com/jobs/view/2", location="Remote, US")
+    assert len(_survivors([a, b])) == 2
+
+def test_same_description_collapses_within_company():
+    idx = NearDupIndex()
+    i = idx.add_doc(job_features(_job(1, company="Acme Inc.", location="Berlin", description=LOREM * 5,
+                                      title="Data Engineer")))
+    j = idx.add_doc(job_features(_job(2, source="indeed", url="https://b/1", company="acme",
+                                      location="Berlin, Germany", description=LOREM * 5, title="Data Engineer")))
+    k = idx.add_doc(job_features(_job(3, source="indeed", url="https://b/2", company="Other Co",
+                                      location="Berlin", description=LOREM * 5, title="Data Engineer")))
+    assert idx.find(i) == idx.find(j) != idx.find(k)